@@ -7,19 +7,6 @@ from models import db, FeedbackQuestion
 def add_open_ended_questions():
     """Add the two open-ended questions if they don't exist"""
     with app.app_context():
-        # Check if questions already exist
-        existing_strengths = FeedbackQuestion.query.filter_by(
-            question_text="What are this employee's main strengths?"
-        ).first()
-        
-        existing_improvements = FeedbackQuestion.query.filter_by(
-            question_text="What areas of improvement would you recommend for this employee?"
-        ).first()
-        
-        if existing_strengths and existing_improvements:
-            print("Open-ended questions already exist in database.")
-            return
-        
         # Add open-ended questions
         open_ended_questions = [
             {
@@ -36,28 +23,39 @@ def add_open_ended_questions():
             }
         ]
         
+        # Check which questions already exist (single query)
+        texts = [q['question_text'] for q in open_ended_questions]
+        existing_by_text = {
+            q.question_text: q
+            for q in FeedbackQuestion.query.filter(FeedbackQuestion.question_text.in_(texts)).all()
+        }
+        
+        to_insert = []
+        update_ids_by_category = {}
         for q_data in open_ended_questions:
-            # Check if question already exists
-            existing = FeedbackQuestion.query.filter_by(
-                question_text=q_data['question_text']
-            ).first()
+            existing = existing_by_text.get(q_data['question_text'])
             
-            if not existing:
-                question = FeedbackQuestion(
+            if existing is None:
+                to_insert.append(FeedbackQuestion(
                     category=q_data['category'],
                     question_text=q_data['question_text'],
                     is_for_managers=q_data['is_for_managers'],
                     is_open_ended=q_data['is_open_ended'],
                     is_active=True
-                )
-                db.session.add(question)
+                ))
                 print(f"Added question: {q_data['question_text'][:50]}...")
             else:
                 # Update existing question to mark it as open-ended
-                existing.is_open_ended = True
-                existing.category = q_data['category']
+                update_ids_by_category.setdefault(q_data['category'], []).append(existing.question_id)
                 print(f"Updated existing question: {q_data['question_text'][:50]}...")
         
+        if to_insert:
+            db.session.bulk_save_objects(to_insert)
+        for category, question_ids in update_ids_by_category.items():
+            FeedbackQuestion.query.filter(FeedbackQuestion.question_id.in_(question_ids)).update(
+                {'is_open_ended': True, 'category': category}, synchronize_session=False
+            )
+        
         db.session.commit()
         print("\nOpen-ended questions added successfully!")
 
@@ -5,6 +5,7 @@ Uses one-way hashing to ensure evaluator identity cannot be determined
 import hashlib
 import hmac
 import os
+from functools import lru_cache
 
 # Secret key for hashing - in production, use environment variable
 # You can set EVALUATOR_SALT environment variable for production
@@ -14,6 +15,58 @@ if _salt_env:
 else:
     EVALUATOR_SALT = b'evaluator_anonymization_salt_2024'  # Change this in production!
 
+# Keyed hash scheme: 'hmac-sha256' (default), 'sha256' (salt-prefixed SHA-256, one
+# compression for short IDs) or 'blake3' (requires the blake3 package).
+# Hashes are persisted, so only pick a non-default scheme for a fresh database -
+# switching on existing data makes stored evaluator hashes unmatchable.
+EVALUATOR_HASH_SCHEME = os.getenv('EVALUATOR_HASH_SCHEME', 'hmac-sha256').lower()
+
+def _build_keyed_prototype(scheme):
+    """Return a hash object keyed with EVALUATOR_SALT, to be copied per message"""
+    if scheme == 'hmac-sha256':
+        # hashlib's sha256 is OpenSSL-backed, so this goes through EVP (SHA-NI where available)
+        return hmac.new(EVALUATOR_SALT, digestmod=hashlib.sha256)
+    if scheme == 'sha256':
+        # Secret salt prefix, NUL-terminated so salt and message cannot run together.
+        # Hashes are never truncated or exposed, so HMAC's length-extension guard isn't needed.
+        return hashlib.sha256(EVALUATOR_SALT + b'\x00')
+    if scheme == 'blake3':
+        try:
+            import blake3
+        except ImportError:
+            raise RuntimeError("EVALUATOR_HASH_SCHEME=blake3 requires the 'blake3' package")
+        # BLAKE3 keyed mode needs exactly 32 key bytes
+        return blake3.blake3(key=hashlib.sha256(EVALUATOR_SALT).digest())
+    raise ValueError(f"Unknown EVALUATOR_HASH_SCHEME: {scheme}")
+
+# Keyed once with the salt; copied per call so the key is not re-expanded every time.
+_KEYED_PROTOTYPE = _build_keyed_prototype(EVALUATOR_HASH_SCHEME)
+
+def make_cycle_hasher(cycle_id, raw=False):
+    """
+    Build a hasher for many evaluators of the same cycle
+    The "_{cycle_id}" suffix is encoded once instead of formatting the full
+    message per evaluator; hashes are identical to hash_evaluator_id.
+    
+    Args:
+        cycle_id: The evaluation cycle ID
+        raw: Return the 32-byte digest instead of the hex string
+        
+    Returns:
+        callable: evaluator_id -> hexadecimal hash (or bytes if raw)
+    """
+    suffix = f"_{cycle_id}".encode('utf-8')
+    
+    def hash_for_cycle(evaluator_id):
+        # Use a keyed hash (HMAC by default) for additional security
+        hash_obj = _KEYED_PROTOTYPE.copy()
+        hash_obj.update(str(evaluator_id).encode('utf-8'))
+        hash_obj.update(suffix)
+        return hash_obj.digest() if raw else hash_obj.hexdigest()
+    
+    return hash_for_cycle
+
+@lru_cache(maxsize=4096)
 def hash_evaluator_id(evaluator_id, cycle_id):
     """
     Create a one-way hash of evaluator_id + cycle_id
@@ -29,13 +82,43 @@ def hash_evaluator_id(evaluator_id, cycle_id):
     Returns:
         str: Hexadecimal hash (64 characters for SHA-256)
     """
-    # Combine evaluator_id and cycle_id with salt
-    message = f"{evaluator_id}_{cycle_id}".encode('utf-8')
+    return make_cycle_hasher(cycle_id)(evaluator_id)
+
+def hash_evaluator_id_bytes(evaluator_id, cycle_id):
+    """
+    Same as hash_evaluator_id but returns the raw 32-byte digest
+    Use for in-memory comparisons and sets; stored columns and logs keep the hex form.
     
-    # Use HMAC for additional security
-    hash_obj = hmac.new(EVALUATOR_SALT, message, hashlib.sha256)
-    return hash_obj.hexdigest()
+    Args:
+        evaluator_id: The actual employee ID
+        cycle_id: The evaluation cycle ID
+        
+    Returns:
+        bytes: 32-byte digest (bytes.fromhex of hash_evaluator_id)
+    """
+    return make_cycle_hasher(cycle_id, raw=True)(evaluator_id)
+
+def hash_evaluator_ids_batch(evaluator_ids, cycle_id):
+    """
+    Hash many evaluator IDs for the same cycle in one pass
+    Avoids per-call overhead when hashing every evaluator of a cycle.
+    Produces exactly the same values as hash_evaluator_id.
+    
+    Args:
+        evaluator_ids: Iterable of employee IDs
+        cycle_id: The evaluation cycle ID
+        
+    Returns:
+        dict: {evaluator_id: hexadecimal hash}
+    """
+    hash_for_cycle = make_cycle_hasher(cycle_id)
+    hashes = {}
+    for evaluator_id in evaluator_ids:
+        if evaluator_id not in hashes:
+            hashes[evaluator_id] = hash_for_cycle(evaluator_id)
+    return hashes
 
+@lru_cache(maxsize=4096)
 def hash_evaluator_metadata(evaluator_id, cycle_id, metadata_type, value):
     """
     Hash evaluator metadata (department, role, etc.) for diversity calculations
@@ -51,18 +134,20 @@ def hash_evaluator_metadata(evaluator_id, cycle_id, metadata_type, value):
         str: Hexadecimal hash
     """
     message = f"{evaluator_id}_{cycle_id}_{metadata_type}_{value}".encode('utf-8')
-    hash_obj = hmac.new(EVALUATOR_SALT, message, hashlib.sha256)
+    hash_obj = _KEYED_PROTOTYPE.copy()
+    hash_obj.update(message)
     return hash_obj.hexdigest()
 
-def get_metadata_hash_groups(hashed_metadata_list):
+def get_metadata_hash_groups(hashed_metadata_iter):
     """
     Get distinct metadata groups from hashed metadata
     This allows diversity calculation without revealing identity
     
     Args:
-        hashed_metadata_list: List of hashed metadata values
+        hashed_metadata_iter: Iterable of hashed metadata values (list, generator,
+            or a yield_per() query column) - consumed once, never materialized
         
     Returns:
         set: Distinct metadata groups
     """
-    return set(hashed_metadata_list)
+    return set(hashed_metadata_iter)
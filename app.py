@@ -1,25 +1,67 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, g
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_wtf.csrf import CSRFProtect
 from werkzeug.utils import secure_filename
+from werkzeug.security import generate_password_hash
+from jinja2 import FileSystemBytecodeCache
 import os
-import pandas as pd
+import shutil
+import stat
 from datetime import datetime, date
 import json
-from functools import wraps
+from functools import partial, wraps
+from itertools import islice
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
 from config import Config
-from models import db, User, Employee, KPI, EvaluationCycle, Evaluation, RandomizationLog, FeedbackQuestion, FeedbackEvaluation, KPICreationRule, EvaluatorScore
+from models import db, User, Employee, KPI, employee_kpis, EvaluationCycle, Evaluation, RandomizationLog, FeedbackQuestion, FeedbackEvaluation, KPICreationRule, EvaluatorScore
 from forms import LoginForm, EmployeeForm, KPIForm, CycleForm, EvaluationForm
 from anonymization import hash_evaluator_id
+from kpi_creation import KPI_CREATION_HIERARCHY, get_kpi_creators_for_employees, get_kpis_for_employee
+from cycle_assignment import assign_360_evaluations, assign_kpi_evaluations
 from utils import (
-    allowed_file, calculate_kpi_averages, get_dashboard_data,
-    send_notification_email
+    allowed_file, calculate_kpi_averages, get_cached_dashboard_data,
+    invalidate_dashboard_cache, send_notification_email, iter_upload_rows
 )
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+
+def _jinja_bytecode_cache(directory):
+    """
+    Bytecode cache in directory, or in Jinja's private per-user directory when none is given.
+    Cached bytecode is executed on load, so a configured directory must belong to this user
+    and must not be writable by group or others.
+    """
+    if not directory:
+        return FileSystemBytecodeCache()
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if (not stat.S_ISDIR(st.st_mode) or st.st_mode & 0o022
+            or (hasattr(os, 'getuid') and st.st_uid != os.getuid())):
+        raise RuntimeError(f'JINJA_BYTECODE_CACHE_DIR {directory!r} must be a directory owned by this user '
+                           'and not writable by group or others')
+    return FileSystemBytecodeCache(directory)
+
+
+# Jinja bytecode cache (opt-in): templates are compiled once and reused across worker restarts
+if app.config.get('JINJA_BYTECODE_CACHE'):
+    app.jinja_env.bytecode_cache = _jinja_bytecode_cache(app.config.get('JINJA_BYTECODE_CACHE_DIR'))
+
+# Dashboard template per role
+TEMPLATE_MAP = {
+    'admin': 'dashboard_admin.html',
+    'ceo': 'dashboard_admin.html',  # CEO uses admin dashboard
+    'technical_manager': 'dashboard_admin.html',  # Technical Manager uses admin dashboard
+    'unit_manager': 'dashboard_manager.html',
+    'department_manager': 'dashboard_manager.html',
+    'manager': 'dashboard_manager.html',
+    'employee': 'dashboard_employee.html'
+}
+RENDER_FOR_ROLE = {role: partial(render_template, template) for role, template in TEMPLATE_MAP.items()}
+
 # Initialize extensions
 csrf = CSRFProtect(app)
 db.init_app(app)
@@ -30,33 +72,61 @@ login_manager.login_message = 'Please log in to access this page.'
 
 # Create upload folder
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+UPLOAD_COPY_BUFSIZE = 1 << 20
+
+# Default password for new accounts; hashed once instead of running the KDF per user
+DEFAULT_PASSWORD = 'password123'
+DEFAULT_PASSWORD_HASH = generate_password_hash(DEFAULT_PASSWORD)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Load the employee in the same query; nearly every view reads current_user.employee
+    return User.query.options(joinedload(User.employee)).get(int(user_id))
 
 @app.context_processor
 def inject_pending_kpi_count():
     """Make pending KPI and KPI evaluation counts available to all templates"""
+    # Computed once per request, even when several templates are rendered
+    cached = g.get('_pending_counts')
+    if cached is not None:
+        return cached
     out = {'pending_kpi_count': 0, 'pending_kpi_evaluation_count': 0}
     if not current_user.is_authenticated or not current_user.employee:
         return out
+    want_kpi = current_user.role == 'admin' or current_user.employee.role == 'CEO'
+    want_evaluation = current_user.employee.role in ['CEO', 'Technical Manager']
+    if not (want_kpi or want_evaluation):
+        g._pending_counts = out
+        return out
     try:
-        if current_user.role == 'admin' or current_user.employee.role == 'CEO':
-            out['pending_kpi_count'] = KPI.query.filter_by(status='pending_review').count()
-        if current_user.employee.role in ['CEO', 'Technical Manager']:
-            out['pending_kpi_evaluation_count'] = Evaluation.query.filter_by(status='pending_review').count()
+        # Both counts as scalar subqueries of a single SELECT (one round trip)
+        pending_kpis = db.session.query(func.count(KPI.kpi_id)).filter(KPI.status == 'pending_review').scalar_subquery()
+        pending_evaluations = db.session.query(func.count(Evaluation.evaluation_id)).filter(Evaluation.status == 'pending_review').scalar_subquery()
+        columns = ([pending_kpis] if want_kpi else []) + ([pending_evaluations] if want_evaluation else [])
+        row = db.session.query(*columns).one()
+        if want_kpi:
+            out['pending_kpi_count'] = row[0]
+        if want_evaluation:
+            out['pending_kpi_evaluation_count'] = row[-1]
     except Exception:
         pass
+    g._pending_counts = out
     return out
 
+def get_active_cycle():
+    """Return the active evaluation cycle (or None); queried at most once per request"""
+    if '_active_cycle' not in g:
+        g._active_cycle = EvaluationCycle.query.filter_by(status='active').first()
+    return g._active_cycle
+
 def role_required(role):
     """Decorator to require specific role"""
     def decorator(f):
         @wraps(f)
         @login_required
         def decorated_function(*args, **kwargs):
-            if current_user.role != role and current_user.role != 'admin':
+            user_role = current_user.role
+            if user_role != role and user_role != 'admin':
                 flash('You do not have permission to access this page.', 'danger')
                 return redirect(url_for('dashboard'))
             return f(*args, **kwargs)
@@ -97,21 +167,10 @@ def logout():
 @login_required
 def dashboard():
     role = current_user.role
-    dashboard_data = get_dashboard_data(current_user.employee.employee_id, role)
-    
-    # Map roles to template names
-    template_map = {
-        'admin': 'dashboard_admin',
-        'ceo': 'dashboard_admin',  # CEO uses admin dashboard
-        'technical_manager': 'dashboard_admin',  # Technical Manager uses admin dashboard
-        'unit_manager': 'dashboard_manager',
-        'department_manager': 'dashboard_manager',
-        'manager': 'dashboard_manager',
-        'employee': 'dashboard_employee'
-    }
-    
-    template_name = template_map.get(role, 'dashboard_employee')
-    return render_template(f'{template_name}.html', data=dashboard_data)
+    active_cycle = get_active_cycle()
+    dashboard_data = get_cached_dashboard_data(current_user.employee.employee_id, role,
+                                               active_cycle.cycle_id if active_cycle else None)
+    return RENDER_FOR_ROLE.get(role, RENDER_FOR_ROLE['employee'])(data=dashboard_data)
 
 # Employee Management Routes (Admin only)
 @app.route('/admin/employees')
@@ -144,17 +203,37 @@ def add_employee():
         user = User(
             employee_id=employee.employee_id,
             email=employee.email,
-            role='employee'
+            role='employee',
+            password_hash=DEFAULT_PASSWORD_HASH  # Default password, should be changed
         )
-        user.set_password('password123')  # Default password, should be changed
         db.session.add(user)
         db.session.commit()
+        invalidate_dashboard_cache()
         
         flash('Employee added successfully!', 'success')
         return redirect(url_for('list_employees'))
     
     return render_template('admin/employee_form.html', form=form, title='Add Employee')
 
+def _bulk_create_employees(employees_payload):
+    """Bulk insert employees, resolve their ids, then bulk insert user accounts. Returns count created."""
+    db.session.bulk_insert_mappings(Employee, employees_payload)
+    new_ids = dict(
+        db.session.query(Employee.email, Employee.employee_id)
+        .filter(Employee.email.in_([p['email'] for p in employees_payload]))
+        .all()
+    )
+    db.session.bulk_insert_mappings(User, [
+        {
+            'employee_id': new_ids[p['email']],
+            'email': p['email'],
+            'role': 'employee',
+            'password_hash': DEFAULT_PASSWORD_HASH
+        }
+        for p in employees_payload
+    ])
+    return len(employees_payload)
+
 @app.route('/admin/employees/upload', methods=['GET', 'POST'])
 @role_required('admin')
 def upload_employees():
@@ -171,19 +250,23 @@ def upload_employees():
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+            # Copy in 1 MB chunks rather than Werkzeug's small default buffer
+            with open(filepath, 'wb', buffering=UPLOAD_COPY_BUFSIZE) as f:
+                shutil.copyfileobj(file.stream, f, length=UPLOAD_COPY_BUFSIZE)
+                if hasattr(os, 'posix_fadvise'):
+                    # File is read back sequentially right after saving
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
             
             try:
-                # Read file
-                if filename.endswith('.csv'):
-                    df = pd.read_csv(filepath)
-                else:
-                    df = pd.read_excel(filepath)
+                # Stream rows from the file (first item is the header)
+                rows = iter_upload_rows(filepath)
+                columns = next(rows)
                 
                 # Validate and process
                 required_columns = ['full_name', 'email', 'department', 'role', 'join_date']
-                missing = [col for col in required_columns if col not in df.columns]
+                missing = [col for col in required_columns if col not in columns]
                 if missing:
+                    rows.close()
                     flash(f'Missing required columns: {", ".join(missing)}', 'danger')
                     os.remove(filepath)
                     return redirect(request.url)
@@ -192,46 +275,66 @@ def upload_employees():
                 success_count = 0
                 error_count = 0
                 
-                for _, row in df.iterrows():
-                    try:
-                        # Check if employee exists
-                        if Employee.query.filter_by(email=row['email']).first():
+                known_emails = set()
+                batch_size = app.config['UPLOAD_BATCH_SIZE']
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    # One IN query per batch instead of one SELECT per row
+                    incoming_emails = {row['email'] for row in batch if row['email']}
+                    known_emails.update(
+                        email for (email,) in db.session.query(Employee.email).filter(Employee.email.in_(incoming_emails)).all()
+                    )
+                    
+                    # Validate the whole batch in Python first; only clean rows reach the DB
+                    employees_payload = []
+                    for row in batch:
+                        # Check required values and whether employee exists (in DB or earlier in this file)
+                        if any(row.get(col) in (None, '') for col in required_columns) or row['email'] in known_emails:
                             error_count += 1
                             continue
                         
                         # Parse join_date
-                        if isinstance(row['join_date'], str):
-                            join_date = datetime.strptime(row['join_date'], '%Y-%m-%d').date()
-                        else:
-                            join_date = row['join_date']
-                        
-                        employee = Employee(
-                            full_name=row['full_name'],
-                            email=row['email'],
-                            department=row['department'],
-                            role=row['role'],
-                            join_date=join_date,
-                            status=row.get('status', 'active')
-                        )
-                        db.session.add(employee)
-                        db.session.flush()
-                        
-                        # Create user account
-                        user = User(
-                            employee_id=employee.employee_id,
-                            email=employee.email,
-                            role='employee'
-                        )
-                        user.set_password('password123')
-                        db.session.add(user)
-                        success_count += 1
+                        try:
+                            if isinstance(row['join_date'], str):
+                                join_date = datetime.strptime(row['join_date'].strip(), '%Y-%m-%d').date()
+                            elif isinstance(row['join_date'], datetime):
+                                join_date = row['join_date'].date()
+                            else:
+                                join_date = row['join_date']
+                        except ValueError:
+                            error_count += 1
+                            continue
                         
-                    except Exception as e:
-                        error_count += 1
-                        db.session.rollback()
+                        employees_payload.append({
+                            'full_name': row['full_name'],
+                            'email': row['email'],
+                            'department': row['department'],
+                            'role': row['role'],
+                            'join_date': join_date,
+                            'status': row.get('status') or 'active'
+                        })
+                        known_emails.add(row['email'])
+                    
+                    if not employees_payload:
                         continue
+                    
+                    # Insert the batch under a savepoint; if a DB constraint rejects it,
+                    # retry this batch row by row so only the bad rows are dropped
+                    try:
+                        with db.session.begin_nested():
+                            success_count += _bulk_create_employees(employees_payload)
+                    except Exception:
+                        for payload in employees_payload:
+                            try:
+                                with db.session.begin_nested():
+                                    success_count += _bulk_create_employees([payload])
+                            except Exception:
+                                error_count += 1
                 
                 db.session.commit()
+                invalidate_dashboard_cache()
                 flash(f'Successfully imported {success_count} employees. {error_count} errors.', 'success')
                 os.remove(filepath)
                 
@@ -244,13 +347,24 @@ def upload_employees():
     return render_template('admin/upload_employees.html')
 
 # KPI Management Routes
+def _assigned_employees_by_kpi():
+    """Map kpi_id -> assigned employees in one query (avoids a SELECT per KPI in list templates)"""
+    assigned = {}
+    rows = db.session.query(employee_kpis.c.kpi_id, Employee).join(
+        Employee, Employee.employee_id == employee_kpis.c.employee_id
+    ).all()
+    for kpi_id, employee in rows:
+        assigned.setdefault(kpi_id, []).append(employee)
+    return assigned
+
 @app.route('/admin/kpis')
 @role_required('admin')
 def list_kpis():
     # Show all KPIs for admin (including pending/declined for management)
     kpis = KPI.query.order_by(KPI.created_at.desc()).all()
     default_kpis_count = KPI.query.filter_by(is_default=True).count()
-    return render_template('admin/kpis.html', kpis=kpis, default_kpis_count=default_kpis_count)
+    return render_template('admin/kpis.html', kpis=kpis, default_kpis_count=default_kpis_count,
+                           assigned_by_kpi=_assigned_employees_by_kpi())
 
 @app.route('/admin/kpis/add', methods=['GET', 'POST'])
 @role_required('admin')
@@ -258,6 +372,7 @@ def add_kpi():
     form = KPIForm()
     employees = Employee.query.filter_by(status='active').order_by(Employee.full_name).all()
     form.employee_ids.choices = [(e.employee_id, e.full_name) for e in employees]
+    employees_by_id = {e.employee_id: e for e in employees}
     if form.validate_on_submit():
         applies = form.applies_to_all.data
         emp_ids = list(form.employee_ids.data or [])
@@ -266,12 +381,13 @@ def add_kpi():
             return render_template('admin/kpi_form.html', form=form, title='Add KPI', employees=employees)
         # Each employee can receive KPIs only from one manager (admin KPIs have created_by=None)
         if not applies:
-            from kpi_creation import get_kpi_creator_for_employee
+            creators = get_kpi_creators_for_employees(emp_ids)
             for eid in emp_ids:
-                creator = get_kpi_creator_for_employee(eid)
+                creator = creators.get(eid)
                 if creator is not None:
-                    emp = Employee.query.get(eid)
-                    other = Employee.query.get(creator)
+                    emp = employees_by_id[eid]
+                    # Creator is normally an active employee already loaded; inactive ones need a lookup
+                    other = employees_by_id.get(creator) or Employee.query.get(creator)
                     other_name = other.full_name if other else 'another manager'
                     flash(f'{emp.full_name} already receives KPIs from {other_name}. Each employee can receive KPIs only from one manager.', 'danger')
                     return render_template('admin/kpi_form.html', form=form, title='Add KPI', employees=employees)
@@ -287,11 +403,13 @@ def add_kpi():
         db.session.add(kpi)
         db.session.flush()
         if not applies and emp_ids:
+            # Selected ids come from the active-employee choices already loaded above
             for eid in emp_ids:
-                emp = Employee.query.get(eid)
+                emp = employees_by_id.get(eid)
                 if emp:
                     kpi.assigned_employees.append(emp)
         db.session.commit()
+        invalidate_dashboard_cache()
         flash('KPI added successfully!', 'success')
         return redirect(url_for('list_kpis'))
     return render_template('admin/kpi_form.html', form=form, title='Add KPI', employees=employees)
@@ -300,12 +418,12 @@ def add_kpi():
 @role_required('admin')
 def admin_edit_kpi(kpi_id):
     """Edit KPI - allows editing both default and custom KPIs"""
-    from flask import g
     g.editing_kpi_id = kpi_id
     kpi = KPI.query.get_or_404(kpi_id)
     form = KPIForm(obj=kpi)
     employees = Employee.query.filter_by(status='active').order_by(Employee.full_name).all()
     form.employee_ids.choices = [(e.employee_id, e.full_name) for e in employees]
+    employees_by_id = {e.employee_id: e for e in employees}
     if request.method == 'GET':
         form.applies_to_all.data = getattr(kpi, 'applies_to_all', False)
         form.employee_ids.data = [e.employee_id for e in kpi.assigned_employees.all()]
@@ -317,13 +435,14 @@ def admin_edit_kpi(kpi_id):
             return render_template('admin/kpi_form.html', form=form, title='Edit KPI', kpi=kpi, employees=employees)
         # Each employee can receive KPIs only from one manager
         if not applies:
-            from kpi_creation import get_kpi_creator_for_employee
             kpi_creator = kpi.created_by  # employee_id or None
+            creators = get_kpi_creators_for_employees(emp_ids, exclude_kpi_id=kpi_id)
             for eid in emp_ids:
-                creator = get_kpi_creator_for_employee(eid, exclude_kpi_id=kpi_id)
+                creator = creators.get(eid)
                 if creator is not None and creator != kpi_creator:
-                    emp = Employee.query.get(eid)
-                    other = Employee.query.get(creator)
+                    emp = employees_by_id[eid]
+                    # Creator is normally an active employee already loaded; inactive ones need a lookup
+                    other = employees_by_id.get(creator) or Employee.query.get(creator)
                     other_name = other.full_name if other else 'another manager'
                     flash(f'{emp.full_name} already receives KPIs from {other_name}. Each employee can receive KPIs only from one manager.', 'danger')
                     return render_template('admin/kpi_form.html', form=form, title='Edit KPI', kpi=kpi, employees=employees)
@@ -334,14 +453,16 @@ def admin_edit_kpi(kpi_id):
         # Update employee assignments
         kpi.assigned_employees = []
         if not applies and emp_ids:
+            # Selected ids come from the active-employee choices already loaded above
             for eid in emp_ids:
-                emp = Employee.query.get(eid)
+                emp = employees_by_id.get(eid)
                 if emp:
                     kpi.assigned_employees.append(emp)
         if kpi.is_default and kpi.status == 'declined':
             kpi.status = 'approved'
             kpi.decline_reason = None
         db.session.commit()
+        invalidate_dashboard_cache()
         flash('KPI updated successfully!', 'success')
         return redirect(url_for('list_kpis'))
     return render_template('admin/kpi_form.html', form=form, title='Edit KPI', kpi=kpi, employees=employees)
@@ -353,18 +474,10 @@ def admin_delete_kpi(kpi_id):
     kpi = KPI.query.get_or_404(kpi_id)
     
     # Check if KPI is being used in evaluations (scores stored as JSON: {kpi_id: score})
-    from models import Evaluation
-    import json
-    all_evals = Evaluation.query.all()
-    kpi_in_use = False
-    for e in all_evals:
-        try:
-            scores = json.loads(e.scores) if e.scores else {}
-            if str(kpi_id) in scores or kpi_id in scores:
-                kpi_in_use = True
-                break
-        except (json.JSONDecodeError, ValueError):
-            continue
+    # Keys are serialized as "<kpi_id>": so the DB can match them without loading/parsing every row
+    kpi_in_use = db.session.query(Evaluation.evaluation_id).filter(
+        Evaluation.scores.like(f'%"{int(kpi_id)}":%')
+    ).first() is not None
     
     if kpi_in_use:
         flash('Cannot delete KPI: It is being used in evaluations. Deactivate it instead.', 'danger')
@@ -376,6 +489,7 @@ def admin_delete_kpi(kpi_id):
     # Delete the KPI
     db.session.delete(kpi)
     db.session.commit()
+    invalidate_dashboard_cache()
     
     flash(f'{kpi_type.capitalize()} KPI "{kpi_name}" deleted successfully!', 'success')
     return redirect(url_for('list_kpis'))
@@ -387,6 +501,7 @@ def toggle_kpi_status(kpi_id):
     kpi = KPI.query.get_or_404(kpi_id)
     kpi.is_active = not kpi.is_active
     db.session.commit()
+    invalidate_dashboard_cache()
     
     status = 'activated' if kpi.is_active else 'deactivated'
     flash(f'KPI "{kpi.kpi_name}" {status} successfully!', 'success')
@@ -406,7 +521,8 @@ def default_kpis():
             kpis_by_role[role] = []
         kpis_by_role[role].append(kpi)
     
-    return render_template('admin/default_kpis.html', kpis_by_role=kpis_by_role)
+    return render_template('admin/default_kpis.html', kpis_by_role=kpis_by_role,
+                           assigned_by_kpi=_assigned_employees_by_kpi())
 
 # KPI Creation Permissions (who can create KPIs for whom)
 @app.route('/admin/kpi-permissions')
@@ -447,11 +563,15 @@ def delete_kpi_permission(rule_id):
 @role_required('admin')
 def reset_kpi_permissions():
     """Reset rules from default hierarchy (KPI_CREATION_HIERARCHY)"""
-    from kpi_creation import KPI_CREATION_HIERARCHY
-    KPICreationRule.query.delete()
-    for manager_role, config in KPI_CREATION_HIERARCHY.items():
-        for target_role in config.get('can_create_for', []):
-            db.session.add(KPICreationRule(manager_role=manager_role, target_role=target_role))
+    rows = [
+        {'manager_role': manager_role, 'target_role': target_role}
+        for manager_role, config in KPI_CREATION_HIERARCHY.items()
+        for target_role in config.get('can_create_for', [])
+    ]
+    db.session.execute(KPICreationRule.__table__.delete())
+    if rows:
+        # Single executemany INSERT instead of one ORM add per rule
+        db.session.execute(KPICreationRule.__table__.insert(), rows)
     db.session.commit()
     flash('KPI creation rules reset to default hierarchy.', 'success')
     return redirect(url_for('kpi_permissions'))
@@ -461,14 +581,15 @@ def reset_kpi_permissions():
 @role_required('admin')
 def list_cycles():
     cycles = EvaluationCycle.query.order_by(EvaluationCycle.created_at.desc()).all()
-    has_active_cycle = EvaluationCycle.query.filter_by(status='active').first() is not None
+    has_active_cycle = db.session.query(EvaluationCycle.cycle_id).filter_by(status='active').first() is not None
     return render_template('admin/cycles.html', cycles=cycles, has_active_cycle=has_active_cycle)
 
 @app.route('/admin/cycles/add', methods=['GET', 'POST'])
 @role_required('admin')
 def add_cycle():
-    active_cycle = EvaluationCycle.query.filter_by(status='active').first()
-    if active_cycle:
+    # Only the name is needed for the message, so don't load the whole row
+    active_cycle = db.session.query(EvaluationCycle.name).filter_by(status='active').first()
+    if active_cycle is not None:
         flash(f'Cannot create a new evaluation round while "{active_cycle.name}" is still active. Please close the current round first.', 'danger')
         return redirect(url_for('list_cycles'))
     
@@ -515,7 +636,6 @@ def assign_evaluators_route(cycle_id):
     
     # Assign based on cycle type
     try:
-        from cycle_assignment import assign_360_evaluations, assign_kpi_evaluations
         if cycle.include_360:
             assign_360_evaluations(employees, cycle_id)
         if cycle.include_kpi:
@@ -527,6 +647,7 @@ def assign_evaluators_route(cycle_id):
     
     cycle.status = 'active'
     db.session.commit()
+    invalidate_dashboard_cache()
     
     parts = []
     if cycle.include_360:
@@ -546,6 +667,7 @@ def close_cycle(cycle_id):
         return redirect(url_for('list_cycles'))
     cycle.status = 'completed'
     db.session.commit()
+    invalidate_dashboard_cache()
     flash(f'Evaluation round "{cycle.name}" has been closed.', 'success')
     return redirect(url_for('list_cycles'))
 
@@ -557,24 +679,37 @@ def my_evaluations():
     # Use hashed evaluator ID for anonymity
     # Need to check all active cycles
     active_cycles = EvaluationCycle.query.filter_by(status='active').all()
+    hash_by_cycle = {cycle.cycle_id: hash_evaluator_id(employee_id, cycle.cycle_id) for cycle in active_cycles}
     assignments = []
-    for cycle in active_cycles:
-        evaluator_hash = hash_evaluator_id(employee_id, cycle.cycle_id)
-        cycle_assignments = RandomizationLog.query.filter_by(
-            evaluator_hash=evaluator_hash,
-            cycle_id=cycle.cycle_id
-        ).all()
-        assignments.extend(cycle_assignments)
+    if hash_by_cycle:
+        # One query for all cycles; the hash is cycle-specific, re-checked below
+        assignments = [
+            a for a in RandomizationLog.query.options(
+                joinedload(RandomizationLog.cycle), joinedload(RandomizationLog.evaluatee)
+            ).filter(
+                RandomizationLog.cycle_id.in_(list(hash_by_cycle)),
+                RandomizationLog.evaluator_hash.in_(list(hash_by_cycle.values()))
+            ).all()
+            if hash_by_cycle.get(a.cycle_id) == a.evaluator_hash
+        ]
+    
+    # Existing evaluations for all assignments in one query
+    evaluation_by_key = {}
+    if assignments:
+        evaluation_by_key = {
+            (e.evaluatee_id, e.cycle_id): e
+            for e in Evaluation.query.filter(
+                Evaluation.evaluator_id == employee_id,
+                Evaluation.evaluatee_id.in_(list({a.evaluatee_id for a in assignments})),
+                Evaluation.cycle_id.in_(list({a.cycle_id for a in assignments}))
+            ).all()
+        }
     
     # Get cycle info and check if already submitted
     evaluations_data = []
     for assignment in assignments:
         cycle = assignment.cycle
-        existing = Evaluation.query.filter_by(
-            evaluator_id=employee_id,
-            evaluatee_id=assignment.evaluatee_id,
-            cycle_id=assignment.cycle_id
-        ).first()
+        existing = evaluation_by_key.get((assignment.evaluatee_id, assignment.cycle_id))
         
         evaluations_data.append({
             'assignment': assignment,
@@ -598,7 +733,6 @@ def submit_evaluation(cycle_id, evaluatee_id):
     
     # Get KPIs for this evaluation (employee-based assignment)
     evaluatee = Employee.query.get(evaluatee_id)
-    from kpi_creation import get_kpis_for_employee
     kpis = get_kpis_for_employee(evaluatee)
     
     # Check if already submitted
@@ -611,19 +745,22 @@ def submit_evaluation(cycle_id, evaluatee_id):
     form = EvaluationForm()
     
     if request.method == 'POST':
+        # Look up only the fields for this evaluatee's KPIs instead of scanning the whole form
         scores = {}
-        for kpi_id, score in request.form.items():
-            if kpi_id.startswith('kpi_'):
-                kpi_id_int = int(kpi_id.replace('kpi_', ''))
-                try:
-                    scores[kpi_id_int] = float(score)
-                except ValueError:
-                    pass
+        for kpi in kpis:
+            raw = request.form.get(f'kpi_{kpi.kpi_id}')
+            if raw is None:
+                continue
+            try:
+                scores[kpi.kpi_id] = float(raw)
+            except ValueError:
+                pass
+        scores_json = json.dumps(scores, separators=(',', ':'))
         
         # Submit as pending_review so CEO can approve; otherwise stays draft and never appears in Pending Approvals
         status = 'pending_review'
         if existing_evaluation:
-            existing_evaluation.scores = json.dumps(scores)
+            existing_evaluation.scores = scores_json
             existing_evaluation.comments = request.form.get('comments', '')
             existing_evaluation.status = status
             existing_evaluation.submitted_at = datetime.utcnow()
@@ -632,13 +769,15 @@ def submit_evaluation(cycle_id, evaluatee_id):
                 evaluator_id=current_user.employee.employee_id,
                 evaluatee_id=evaluatee_id,
                 cycle_id=cycle_id,
-                scores=json.dumps(scores),
+                scores=scores_json,
                 comments=request.form.get('comments', ''),
                 status=status
             )
             db.session.add(evaluation)
         
         db.session.commit()
+        invalidate_dashboard_cache(current_user.employee.employee_id)
+        invalidate_dashboard_cache(evaluatee_id)
         flash('Evaluation submitted successfully!', 'success')
         return redirect(url_for('my_evaluations'))
     
@@ -665,7 +804,7 @@ def department_report():
     subordinates = Employee.query.filter_by(manager_id=employee_id).all()
     
     # Get latest cycle
-    latest_cycle = EvaluationCycle.query.filter_by(status='active').first()
+    latest_cycle = get_active_cycle()
     if not latest_cycle:
         flash('No active evaluation cycle found', 'info')
         return redirect(url_for('dashboard'))
@@ -717,7 +856,7 @@ def my_performance():
     employee = Employee.query.get(employee_id)
     
     # Get active cycle
-    latest_cycle = EvaluationCycle.query.filter_by(status='active').first()
+    latest_cycle = get_active_cycle()
     if not latest_cycle:
         flash('No active evaluation cycle found', 'info')
         return redirect(url_for('dashboard'))
@@ -816,9 +955,9 @@ if __name__ == '__main__':
                     ceo_user = User(
                         employee_id=ceo.employee_id,
                         email=ceo.email,
-                        role='admin'
+                        role='admin',
+                        password_hash=DEFAULT_PASSWORD_HASH
                     )
-                    ceo_user.set_password('password123')
                     db.session.add(ceo_user)
                     db.session.commit()
                     print(f"CEO/Admin user created: {ceo.email} / password123")
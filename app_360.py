@@ -2,67 +2,178 @@
 Additional routes for 360-degree feedback system
 This file contains routes that need to be added to app.py
 """
-from flask import render_template, request, redirect, url_for, flash, jsonify
+from flask import render_template, request, redirect, url_for, flash, jsonify, g
 from flask_login import login_required, current_user
 from models import db, Employee, EvaluationCycle, FeedbackQuestion, FeedbackEvaluation, RandomizationLog, KPI, Evaluation, EvaluatorScore, DeletedFeedbackCategory, EvaluationRelationship
 from forms import FeedbackQuestionForm, FEEDBACK_QUESTION_CATEGORIES, NEW_CATEGORY_VALUE
 from datetime import datetime
+from sqlalchemy import and_, case, func, literal, tuple_
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from anonymization import hash_evaluator_id, hash_evaluator_metadata
+from utils import invalidate_dashboard_cache
 import json
+import threading
+import time
+from collections import namedtuple
+
+# Max ids per IN (...) list when deleting a whole category
+CATEGORY_DELETE_CHUNK_SIZE = 500
+
+# Active 360 questions, cached in-process as plain ActiveQuestion tuples (never ORM rows, so the
+# cache is safe to share across requests and threads). The question admin routes in this module
+# invalidate it, but only in the worker that handled the change: other workers, and changes made by
+# scripts, are picked up when the TTL expires. Only the "My 360" list (question counts) reads the cache;
+# the 360 form and its submission load the questions from the database so inactive ones are never accepted.
+QUESTIONS_CACHE_TTL = 60  # seconds
+_QUESTIONS_CACHE = {'version': 0, 'rows': None, 'expires': 0.0}
+_questions_cache_lock = threading.Lock()
+
+ActiveQuestion = namedtuple('ActiveQuestion', [
+    'question_id', 'category', 'question_text', 'is_open_ended', 'is_for_managers', 'question_scope'
+])
+
+
+def _load_active_questions():
+    """Read the active questions straight from the database, as ActiveQuestion tuples."""
+    columns = [getattr(FeedbackQuestion, name) for name in ActiveQuestion._fields]
+    return [ActiveQuestion(*row) for row in db.session.query(*columns).filter(FeedbackQuestion.is_active == True).all()]
+
+
+def _get_active_questions():
+    """Return the active questions as ActiveQuestion tuples, from the in-process cache when fresh."""
+    now = time.monotonic()
+    with _questions_cache_lock:
+        if _QUESTIONS_CACHE['rows'] is not None and _QUESTIONS_CACHE['expires'] > now:
+            return _QUESTIONS_CACHE['rows']
+        version = _QUESTIONS_CACHE['version']
+    rows = _load_active_questions()
+    with _questions_cache_lock:
+        # Don't store a result that raced with an invalidation
+        if _QUESTIONS_CACHE['version'] == version:
+            _QUESTIONS_CACHE['rows'] = rows
+            _QUESTIONS_CACHE['expires'] = now + QUESTIONS_CACHE_TTL
+    return rows
+
+
+def _invalidate_questions_cache():
+    """Drop cached questions after any change to feedback_questions (this worker only)."""
+    with _questions_cache_lock:
+        _QUESTIONS_CACHE['version'] += 1
+        _QUESTIONS_CACHE['rows'] = None
+
+
+def _load_existing_feedback(evaluator_hash, evaluatee_id, cycle_id):
+    """One evaluator's saved answers for an assignment, with their questions loaded in the same query."""
+    return FeedbackEvaluation.query.options(joinedload(FeedbackEvaluation.question)).filter_by(
+        evaluator_hash=evaluator_hash,
+        evaluatee_id=evaluatee_id,
+        cycle_id=cycle_id
+    ).all()
+
+
+def _parse_score(raw):
+    """Return raw as a float score if it is a number in 1-5, else None."""
+    if not raw:
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        return None
+    return value if 1 <= value <= 5 else None
+
 
 def _ceo_or_admin():
-    """Return True if current user is CEO or admin."""
-    if not current_user.is_authenticated or not current_user.employee:
-        return False
-    return (current_user.employee.role == 'CEO') or (current_user.role == 'admin')
+    """Return True if current user is CEO or admin (computed once per request)."""
+    if '_is_ceo_or_admin' not in g:
+        if not current_user.is_authenticated or not current_user.employee:
+            g._is_ceo_or_admin = False
+        else:
+            g._is_ceo_or_admin = (current_user.employee.role == 'CEO') or (current_user.role == 'admin')
+    return g._is_ceo_or_admin
 
 
-def _get_360_relationship(evaluator_employee, evaluatee_employee):
+def _get_360_relationship(evaluator_employee, evaluatee_employee, rel_map=None):
     """
     Look up evaluation matrix: 1 = direct, 0 = indirect, x/z = none/self.
     Matrix uses Employee.full_name as role labels. Returns '1', '0', or None (treat as global-only).
+    rel_map: optional {(evaluator_role, evaluatee_role): relationship} prefetched by the caller.
     """
     if not evaluator_employee or not evaluatee_employee:
         return None
-    rec = EvaluationRelationship.query.filter_by(
-        evaluator_role=evaluator_employee.full_name,
-        evaluatee_role=evaluatee_employee.full_name
-    ).first()
-    if not rec or rec.relationship in ('x', 'z'):
+    if rel_map is not None:
+        relationship = rel_map.get((evaluator_employee.full_name, evaluatee_employee.full_name))
+    else:
+        rec = EvaluationRelationship.query.filter_by(
+            evaluator_role=evaluator_employee.full_name,
+            evaluatee_role=evaluatee_employee.full_name
+        ).first()
+        relationship = rec.relationship if rec else None
+    if not relationship or relationship in ('x', 'z'):
         return None
-    return rec.relationship
+    return relationship
 
 
-def get_questions_for_360(evaluator_employee, evaluatee_employee):
+def _get_360_relationship_map(evaluator_employee, evaluatees):
+    """Prefetch matrix entries for one evaluator against many evaluatees (single IN query)."""
+    names = list({e.full_name for e in evaluatees if e})
+    if not evaluator_employee or not names:
+        return {}
+    rows = db.session.query(
+        EvaluationRelationship.evaluatee_role, EvaluationRelationship.relationship
+    ).filter(
+        EvaluationRelationship.evaluator_role == evaluator_employee.full_name,
+        EvaluationRelationship.evaluatee_role.in_(names)
+    ).all()
+    rel_map = {}
+    for evaluatee_role, relationship in rows:
+        # Keep the first row per pair, as .first() does
+        rel_map.setdefault((evaluator_employee.full_name, evaluatee_role), relationship)
+    return rel_map
+
+
+def get_questions_for_360(evaluator_employee, evaluatee_employee, active_questions=None, rel_map=None):
     """
     Return active 360 questions for this evaluator–evaluatee pair.
     - relationship '1' (direct): global + direct questions.
     - relationship '0' or missing: global questions only.
+    active_questions / rel_map: optional prefetched data so list views don't query per assignment.
     """
-    rel = _get_360_relationship(evaluator_employee, evaluatee_employee)
+    rel = _get_360_relationship(evaluator_employee, evaluatee_employee, rel_map)
     is_direct = (rel == '1')
-    base = FeedbackQuestion.query.filter_by(is_active=True).all()
-    out = []
+    base = active_questions if active_questions is not None else _get_active_questions()
+    # Open-ended questions always last (last two in My 360-Degree Feedback Evaluations);
+    # collected separately so no sort is needed and the original order is kept within each group
+    scored, open_ended = [], []
     for q in base:
-        if not getattr(q, 'question_scope', 'global') or q.question_scope == 'global':
-            out.append(q)
-        elif q.question_scope == 'direct' and is_direct:
-            out.append(q)
-    # Open-ended questions always last (last two in My 360-Degree Feedback Evaluations)
-    out.sort(key=lambda q: (1 if getattr(q, 'is_open_ended', False) else 0))
-    return out
+        if not q.question_scope or q.question_scope == 'global' or (q.question_scope == 'direct' and is_direct):
+            (open_ended if q.is_open_ended else scored).append(q)
+    return scored + open_ended
 
 
 def _get_category_choices(current_category=None):
     """
     Build category dropdown choices: standard + distinct from DB, excluding deleted categories, plus "Add new category".
     """
-    deleted_names = {row[0] for row in db.session.query(DeletedFeedbackCategory.name).all()}
+    # One round trip: deleted names plus distinct question categories that are not deleted (anti-join in SQL)
+    deleted_query = db.session.query(literal('deleted'), DeletedFeedbackCategory.name)
+    category_query = db.session.query(literal('category'), FeedbackQuestion.category).filter(
+        FeedbackQuestion.category.isnot(None),
+        ~FeedbackQuestion.category.in_(db.session.query(DeletedFeedbackCategory.name))
+    ).distinct()
+    deleted_names = set()
+    distinct_cats = []
+    for kind, name in deleted_query.union_all(category_query).all():
+        if kind == 'deleted':
+            deleted_names.add(name)
+        elif name:
+            distinct_cats.append(name)
     standard_values = {c[0] for c in FEEDBACK_QUESTION_CATEGORIES}
-    # Exclude deleted from standard and from DB
+    # Exclude deleted from standard (DB categories are already filtered)
     standard_choices = [(v, l) for v, l in FEEDBACK_QUESTION_CATEGORIES if v not in deleted_names]
-    distinct_cats = [row[0] for row in db.session.query(FeedbackQuestion.category).distinct().all() if row[0]]
-    extra = [c for c in distinct_cats if c not in standard_values and c not in deleted_names]
+    extra = [c for c in distinct_cats if c not in standard_values]
     choices = standard_choices + [(c, c) for c in extra] + [(NEW_CATEGORY_VALUE, '— Add new category —')]
     return choices
 
@@ -71,51 +182,62 @@ def calculate_and_store_evaluator_score(evaluator_hash, evaluatee_id, cycle_id):
     Calculate and store the final score for an evaluator-evaluatee pair.
     This is the average of all scored questions (excluding open-ended).
     """
-    # Get all submitted feedback evaluations for this evaluator-evaluatee pair
-    feedback_evaluations = FeedbackEvaluation.query.filter_by(
-        evaluator_hash=evaluator_hash,
-        evaluatee_id=evaluatee_id,
-        cycle_id=cycle_id,
-        status='submitted'
-    ).all()
+    # Average and count of submitted scores, computed by the DB.
+    # Only scored questions count: open-ended (NULL treated as not open-ended), inactive and missing questions are excluded
+    average, question_count = db.session.query(
+        func.avg(FeedbackEvaluation.score), func.count(FeedbackEvaluation.score)
+    ).join(
+        FeedbackQuestion, FeedbackQuestion.question_id == FeedbackEvaluation.question_id
+    ).filter(
+        FeedbackEvaluation.evaluator_hash == evaluator_hash,
+        FeedbackEvaluation.evaluatee_id == evaluatee_id,
+        FeedbackEvaluation.cycle_id == cycle_id,
+        FeedbackEvaluation.status == 'submitted',
+        FeedbackEvaluation.score.isnot(None),
+        func.coalesce(FeedbackQuestion.is_open_ended, False) == False,
+        FeedbackQuestion.is_active == True
+    ).one()
     
-    # Get only scored questions (exclude open-ended and inactive/missing questions)
-    scores = [f.score for f in feedback_evaluations 
-              if f.score is not None 
-              and f.question 
-              and not getattr(f.question, 'is_open_ended', True) 
-              and getattr(f.question, 'is_active', True)]
-    
-    if not scores:
+    if not question_count:
         # No scores available, don't create a record
         return
     
-    # Calculate average score
-    final_score = sum(scores) / len(scores)
+    final_score = float(average)
     
-    # Check if score already exists
-    existing = EvaluatorScore.query.filter_by(
-        evaluator_hash=evaluator_hash,
-        evaluatee_id=evaluatee_id,
-        cycle_id=cycle_id
-    ).first()
+    # Single-statement upsert on the (evaluator_hash, evaluatee_id, cycle_id) unique constraint
+    values = {
+        'evaluator_hash': evaluator_hash,
+        'evaluatee_id': evaluatee_id,
+        'cycle_id': cycle_id,
+        'final_score': final_score,
+        'question_count': question_count,
+        'calculated_at': datetime.utcnow()
+    }
+    update = {k: values[k] for k in ('final_score', 'question_count', 'calculated_at')}
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql_insert(EvaluatorScore).values(**values).on_duplicate_key_update(**update)
+    elif dialect in ('postgresql', 'sqlite'):
+        insert = pg_insert if dialect == 'postgresql' else sqlite_insert
+        stmt = insert(EvaluatorScore).values(**values).on_conflict_do_update(
+            index_elements=['evaluator_hash', 'evaluatee_id', 'cycle_id'], set_=update
+        )
+    else:
+        stmt = None
     
-    if existing:
-        # Update existing score
-        existing.final_score = final_score
-        existing.question_count = len(scores)
-        existing.calculated_at = datetime.utcnow()
+    if stmt is not None:
+        db.session.execute(stmt)
     else:
-        # Create new score
-        evaluator_score = EvaluatorScore(
+        existing = EvaluatorScore.query.filter_by(
             evaluator_hash=evaluator_hash,
             evaluatee_id=evaluatee_id,
-            cycle_id=cycle_id,
-            final_score=final_score,
-            question_count=len(scores),
-            calculated_at=datetime.utcnow()
-        )
-        db.session.add(evaluator_score)
+            cycle_id=cycle_id
+        ).first()
+        if existing:
+            for key, value in update.items():
+                setattr(existing, key, value)
+        else:
+            db.session.add(EvaluatorScore(**values))
     
     db.session.commit()
 
@@ -130,40 +252,60 @@ def register_360_routes(app):
         
         # Get all active cycles and find assignments using hashed evaluator ID
         active_cycles = EvaluationCycle.query.filter_by(status='active').all()
+        hash_by_cycle = {cycle.cycle_id: hash_evaluator_id(employee_id, cycle.cycle_id) for cycle in active_cycles}
         assignments = []
-        for cycle in active_cycles:
-            evaluator_hash = hash_evaluator_id(employee_id, cycle.cycle_id)
-            cycle_assignments = RandomizationLog.query.filter_by(
-                evaluator_hash=evaluator_hash,
-                evaluation_type='360',
-                cycle_id=cycle.cycle_id
+        if hash_by_cycle:
+            # One query for all cycles; the hash is cycle-specific, re-checked below.
+            # Cycle and evaluatee are read for every row below; load them in the same query
+            assignments = [
+                a for a in RandomizationLog.query.options(
+                    joinedload(RandomizationLog.cycle), joinedload(RandomizationLog.evaluatee)
+                ).filter(
+                    RandomizationLog.cycle_id.in_(list(hash_by_cycle)),
+                    RandomizationLog.evaluator_hash.in_(list(hash_by_cycle.values())),
+                    RandomizationLog.evaluation_type == '360'
+                ).all()
+                if hash_by_cycle.get(a.cycle_id) == a.evaluator_hash
+            ]
+        
+        # Questions and matrix entries are fetched once; question lists are shared per evaluatee
+        evaluator_emp = current_user.employee
+        active_questions = _get_active_questions()
+        rel_map = _get_360_relationship_map(evaluator_emp, [a.evaluatee for a in assignments])
+        questions_by_pair = {}
+        
+        # Feedback counts per (evaluator_hash, evaluatee, cycle) and status in one GROUP BY query
+        feedback_counts = {}
+        if assignments:
+            pairs = list({(a.evaluatee_id, a.cycle_id) for a in assignments})
+            rows = db.session.query(
+                FeedbackEvaluation.evaluator_hash, FeedbackEvaluation.evaluatee_id,
+                FeedbackEvaluation.cycle_id, FeedbackEvaluation.status, func.count()
+            ).filter(
+                FeedbackEvaluation.evaluator_hash.in_(list({hash_by_cycle[cid] for _, cid in pairs})),
+                tuple_(FeedbackEvaluation.evaluatee_id, FeedbackEvaluation.cycle_id).in_(pairs)
+            ).group_by(
+                FeedbackEvaluation.evaluator_hash, FeedbackEvaluation.evaluatee_id,
+                FeedbackEvaluation.cycle_id, FeedbackEvaluation.status
             ).all()
-            assignments.extend(cycle_assignments)
+            for row_hash, evaluatee_id, cycle_id, status, count in rows:
+                feedback_counts.setdefault((row_hash, evaluatee_id, cycle_id), {})[status] = count
         
         evaluations_data = []
         for assignment in assignments:
             cycle = assignment.cycle
-            evaluator_hash = hash_evaluator_id(employee_id, assignment.cycle_id)
+            evaluator_hash = hash_by_cycle[assignment.cycle_id]
             evaluatee = assignment.evaluatee
-            evaluator_emp = current_user.employee
-            questions = get_questions_for_360(evaluator_emp, evaluatee)
+            pair = (evaluator_emp.full_name, evaluatee.full_name if evaluatee else None)
+            if pair not in questions_by_pair:
+                questions_by_pair[pair] = get_questions_for_360(evaluator_emp, evaluatee, active_questions, rel_map)
+            questions = questions_by_pair[pair]
             total_questions = len(questions)
             
-            # Count submitted questions (not draft)
-            submitted_count = FeedbackEvaluation.query.filter_by(
-                evaluator_hash=evaluator_hash,
-                evaluatee_id=assignment.evaluatee_id,
-                cycle_id=assignment.cycle_id,
-                status='submitted'
-            ).count()
-            
-            # Count draft questions
-            draft_count = FeedbackEvaluation.query.filter_by(
-                evaluator_hash=evaluator_hash,
-                evaluatee_id=assignment.evaluatee_id,
-                cycle_id=assignment.cycle_id,
-                status='draft'
-            ).count()
+            # Submitted (not draft) and draft question counts
+            status_counts = feedback_counts.get((evaluator_hash, assignment.evaluatee_id, assignment.cycle_id), {})
+            submitted_count = status_counts.get('submitted', 0)
+            draft_count = status_counts.get('draft', 0)
             
             # Determine overall status
             if submitted_count == total_questions and total_questions > 0:
@@ -184,7 +326,7 @@ def register_360_routes(app):
                 'status': status
             })
         
-        latest_cycle = EvaluationCycle.query.filter_by(status='active').first()
+        latest_cycle = active_cycles[0] if active_cycles else None
         return render_template('evaluations/360_list.html', evaluations=evaluations_data, latest_cycle=latest_cycle)
     
     @app.route('/evaluations/360/<int:cycle_id>/<int:evaluatee_id>', methods=['GET', 'POST'])
@@ -202,23 +344,22 @@ def register_360_routes(app):
         
         evaluatee = Employee.query.get(evaluatee_id)
         evaluator_emp = current_user.employee
-        questions = get_questions_for_360(evaluator_emp, evaluatee)
+        # Read from the database, not the cache: only questions active right now are shown or accepted
+        questions = get_questions_for_360(evaluator_emp, evaluatee, _load_active_questions())
         
         if request.method == 'POST':
             # Get action (draft or submit)
             action = request.form.get('action', 'draft')  # 'draft' or 'submit'
             
-            # Use hashed evaluator ID for anonymity
-            evaluator_hash = hash_evaluator_id(current_user.employee.employee_id, cycle_id)
+            # Hashed evaluator ID (computed above) and metadata hashes are the same for every question
             evaluator = current_user.employee
             is_manager = evaluator.employee_id == evaluatee.manager_id if evaluatee else False
+            department_hash = hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'department', evaluator.department)
+            role_hash = hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'role', evaluator.role)
+            is_manager_hash = hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'is_manager', str(is_manager))
             
             # Get existing evaluations for this assignment
-            existing = FeedbackEvaluation.query.filter_by(
-                evaluator_hash=evaluator_hash,
-                evaluatee_id=evaluatee_id,
-                cycle_id=cycle_id
-            ).all()
+            existing = _load_existing_feedback(evaluator_hash, evaluatee_id, cycle_id)
             existing_dict = {e.question_id: e for e in existing}
             
             # Determine status and submitted_at
@@ -229,11 +370,29 @@ def register_360_routes(app):
                 status = 'draft'
                 submitted_at = None
             
-            # Process submitted scores and open-ended responses
+            # Split the form once into per-question dicts (first value per key, as request.form.get does)
+            fields_by_prefix = {'question_': {}, 'comment_': {}, 'open_ended_': {}}
+            for key, value in request.form.to_dict().items():
+                for prefix, fields in fields_by_prefix.items():
+                    if key.startswith(prefix):
+                        suffix = key[len(prefix):]
+                        if suffix.isdigit():
+                            fields[int(suffix)] = value
+                        break
+            scores_by_qid = {}
+            for qid, raw in fields_by_prefix['question_'].items():
+                score = _parse_score(raw)
+                if score is not None:
+                    scores_by_qid[qid] = score
+            comments_by_qid = fields_by_prefix['comment_']
+            open_by_qid = fields_by_prefix['open_ended_']
+            
+            # Process submitted scores and open-ended responses; new rows are inserted together below
+            new_rows = []
             for question in questions:
                 if question.is_open_ended:
                     # Open-ended question: use comment field, no score
-                    response_text = request.form.get(f'open_ended_{question.question_id}', '').strip()
+                    response_text = open_by_qid.get(question.question_id, '').strip()
                     if response_text:
                         if question.question_id in existing_dict:
                             # Update existing
@@ -253,47 +412,47 @@ def register_360_routes(app):
                                 comment=response_text,
                                 status=status,
                                 submitted_at=submitted_at,
-                                evaluator_department_hash=hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'department', evaluator.department),
-                                evaluator_role_hash=hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'role', evaluator.role),
-                                is_manager_hash=hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'is_manager', str(is_manager))
+                                evaluator_department_hash=department_hash,
+                                evaluator_role_hash=role_hash,
+                                is_manager_hash=is_manager_hash
                             )
-                            db.session.add(feedback)
+                            new_rows.append(feedback)
                 else:
-                    # Regular question: score required, optional comment
-                    score = request.form.get(f'question_{question.question_id}')
-                    comment = request.form.get(f'comment_{question.question_id}', '')
+                    # Regular question: score required (valid 1-5, parsed above), optional comment
+                    score_float = scores_by_qid.get(question.question_id)
+                    comment = comments_by_qid.get(question.question_id, '')
                     
-                    if score:
-                        try:
-                            score_float = float(score)
-                            if 1 <= score_float <= 5:
-                                if question.question_id in existing_dict:
-                                    # Update existing
-                                    existing_dict[question.question_id].score = score_float
-                                    existing_dict[question.question_id].comment = comment
-                                    existing_dict[question.question_id].status = status
-                                    if action == 'submit':
-                                        existing_dict[question.question_id].submitted_at = submitted_at
-                                else:
-                                    # Create new with anonymized evaluator ID
-                                    feedback = FeedbackEvaluation(
-                                        evaluator_hash=evaluator_hash,
-                                        evaluatee_id=evaluatee_id,
-                                        cycle_id=cycle_id,
-                                        question_id=question.question_id,
-                                        score=score_float,
-                                        comment=comment,
-                                        status=status,
-                                        submitted_at=submitted_at,
-                                        evaluator_department_hash=hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'department', evaluator.department),
-                                        evaluator_role_hash=hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'role', evaluator.role),
-                                        is_manager_hash=hash_evaluator_metadata(evaluator.employee_id, cycle_id, 'is_manager', str(is_manager))
-                                    )
-                                    db.session.add(feedback)
-                        except ValueError:
-                            pass
+                    if score_float is not None:
+                        if question.question_id in existing_dict:
+                            # Update existing
+                            existing_dict[question.question_id].score = score_float
+                            existing_dict[question.question_id].comment = comment
+                            existing_dict[question.question_id].status = status
+                            if action == 'submit':
+                                existing_dict[question.question_id].submitted_at = submitted_at
+                        else:
+                            # Create new with anonymized evaluator ID
+                            feedback = FeedbackEvaluation(
+                                evaluator_hash=evaluator_hash,
+                                evaluatee_id=evaluatee_id,
+                                cycle_id=cycle_id,
+                                question_id=question.question_id,
+                                score=score_float,
+                                comment=comment,
+                                status=status,
+                                submitted_at=submitted_at,
+                                evaluator_department_hash=department_hash,
+                                evaluator_role_hash=role_hash,
+                                is_manager_hash=is_manager_hash
+                            )
+                            new_rows.append(feedback)
             
+            # Existing rows are updated in place (already loaded); new rows go in one multi-row INSERT
+            if new_rows:
+                db.session.bulk_save_objects(new_rows)
             db.session.commit()
+            invalidate_dashboard_cache(current_user.employee.employee_id)
+            invalidate_dashboard_cache(evaluatee_id)
             
             # Calculate and store evaluator score if submitted
             if action == 'submit':
@@ -304,13 +463,8 @@ def register_360_routes(app):
             return redirect(url_for('my_360_evaluations'))
         
         # Get existing scores for pre-population (using hashed evaluator ID)
-        evaluator_hash = hash_evaluator_id(current_user.employee.employee_id, cycle_id)
         existing_scores = {}
-        existing = FeedbackEvaluation.query.filter_by(
-            evaluator_hash=evaluator_hash,
-            evaluatee_id=evaluatee_id,
-            cycle_id=cycle_id
-        ).all()
+        existing = _load_existing_feedback(evaluator_hash, evaluatee_id, cycle_id)
         
         # Original "fully submitted" logic: all records for this assignment are submitted
         is_fully_submitted = all(e.status == 'submitted' for e in existing) and len(existing) > 0
@@ -364,6 +518,7 @@ def register_360_routes(app):
             )
             db.session.add(q)
             db.session.commit()
+            _invalidate_questions_cache()
             flash('360 feedback question added.', 'success')
             return redirect(url_for('list_360_questions'))
         return render_template('360_questions/add.html', form=form, new_category_value=NEW_CATEGORY_VALUE)
@@ -388,6 +543,7 @@ def register_360_routes(app):
             question.is_open_ended = form.is_open_ended.data
             question.is_active = form.is_active.data
             db.session.commit()
+            _invalidate_questions_cache()
             flash('360 feedback question updated.', 'success')
             return redirect(url_for('list_360_questions'))
         return render_template('360_questions/edit.html', form=form, question=question, new_category_value=NEW_CATEGORY_VALUE)
@@ -404,6 +560,7 @@ def register_360_routes(app):
         FeedbackEvaluation.query.filter_by(question_id=question_id).delete(synchronize_session=False)
         db.session.delete(question)
         db.session.commit()
+        _invalidate_questions_cache()
         flash('360 feedback question and all its evaluations have been permanently deleted.', 'success')
         return redirect(url_for('list_360_questions'))
 
@@ -415,15 +572,12 @@ def register_360_routes(app):
             flash('You do not have permission to manage categories.', 'danger')
             return redirect(url_for('dashboard'))
         # Only show categories that actually have questions in the DB (so deleted categories disappear)
-        distinct_from_db = [row[0] for row in db.session.query(FeedbackQuestion.category).distinct().all() if row[0]]
-        all_names = sorted(set(distinct_from_db))
-        categories = []
-        for name in all_names:
-            count = FeedbackQuestion.query.filter_by(category=name).count()
-            categories.append({
-                'name': name,
-                'question_count': count,
-            })
+        rows = db.session.query(FeedbackQuestion.category, func.count()).group_by(FeedbackQuestion.category).all()
+        categories = [
+            {'name': name, 'question_count': count}
+            for name, count in sorted(rows)
+            if name
+        ]
         return render_template('360_questions/categories.html', categories=categories)
 
     @app.route('/360-questions/categories/delete', methods=['POST'])
@@ -437,21 +591,25 @@ def register_360_routes(app):
         if not name:
             flash('Category name is required.', 'danger')
             return redirect(url_for('list_360_categories'))
-        questions = FeedbackQuestion.query.filter_by(category=name).all()
-        question_ids = [q.question_id for q in questions]
+        question_ids = [qid for (qid,) in db.session.query(FeedbackQuestion.question_id).filter_by(category=name).all()]
+        already_deleted = db.session.query(
+            db.session.query(DeletedFeedbackCategory.id).filter_by(name=name).exists()
+        ).scalar()
         if question_ids:
-            # Delete all feedback evaluations that reference these questions
-            FeedbackEvaluation.query.filter(FeedbackEvaluation.question_id.in_(question_ids)).delete(synchronize_session=False)
-            # Delete all questions in this category
-            FeedbackQuestion.query.filter_by(category=name).delete()
+            # Delete evaluations, then the questions themselves, in chunks to keep IN lists bounded
+            for start in range(0, len(question_ids), CATEGORY_DELETE_CHUNK_SIZE):
+                chunk = question_ids[start:start + CATEGORY_DELETE_CHUNK_SIZE]
+                FeedbackEvaluation.query.filter(FeedbackEvaluation.question_id.in_(chunk)).delete(synchronize_session=False)
+                FeedbackQuestion.query.filter(FeedbackQuestion.question_id.in_(chunk)).delete(synchronize_session=False)
             # Record category as deleted so it is removed from the dropdown
-            if not DeletedFeedbackCategory.query.filter_by(name=name).first():
+            if not already_deleted:
                 db.session.add(DeletedFeedbackCategory(name=name))
             db.session.commit()
+            _invalidate_questions_cache()
             flash(f'Category "{name}" and all its questions and evaluations have been permanently deleted. It is also removed from the dropdown.', 'success')
         else:
             # No questions; still record as deleted so it disappears from dropdown if it was there (e.g. standard)
-            if not DeletedFeedbackCategory.query.filter_by(name=name).first():
+            if not already_deleted:
                 db.session.add(DeletedFeedbackCategory(name=name))
                 db.session.commit()
             flash(f'Category "{name}" has been removed from the dropdown.', 'info')
@@ -472,9 +630,17 @@ def calculate_employee_360_score(employee_id, cycle_id):
     """
     from results_visibility import calculate_trimmed_mean_360_score
     
-    feedbacks = FeedbackEvaluation.query.filter_by(
-        evaluatee_id=employee_id,
-        cycle_id=cycle_id
+    # Only rows that can count (submitted, scored) and only the columns the trimmed mean reads;
+    # the question flags come in the same query instead of one lazy load per row
+    feedbacks = FeedbackEvaluation.query.options(
+        load_only(FeedbackEvaluation.evaluator_hash, FeedbackEvaluation.score,
+                  FeedbackEvaluation.status, FeedbackEvaluation.question_id),
+        joinedload(FeedbackEvaluation.question).load_only(FeedbackQuestion.is_open_ended, FeedbackQuestion.is_active)
+    ).filter(
+        FeedbackEvaluation.evaluatee_id == employee_id,
+        FeedbackEvaluation.cycle_id == cycle_id,
+        FeedbackEvaluation.status == 'submitted',
+        FeedbackEvaluation.score.isnot(None)
     ).all()
     
     # Calculate trimmed mean (reduces impact of extreme scores)
@@ -483,27 +649,37 @@ def calculate_employee_360_score(employee_id, cycle_id):
 
 def get_feedback_details(employee_id, cycle_id):
     """Get detailed 360 feedback by category"""
-    feedbacks = FeedbackEvaluation.query.filter_by(
-        evaluatee_id=employee_id,
-        cycle_id=cycle_id
-    ).all()
+    # Per-category average/count of scored (non open-ended) answers, aggregated by the DB.
+    # Every active-question category with feedback is listed, even without scores.
+    is_scored = and_(FeedbackEvaluation.score.isnot(None), func.coalesce(FeedbackQuestion.is_open_ended, False) == False)
+    score_rows = db.session.query(
+        FeedbackQuestion.category,
+        func.avg(case((is_scored, FeedbackEvaluation.score))),
+        func.count(case((is_scored, FeedbackEvaluation.score)))
+    ).join(
+        FeedbackQuestion, FeedbackQuestion.question_id == FeedbackEvaluation.question_id
+    ).filter(
+        FeedbackEvaluation.evaluatee_id == employee_id,
+        FeedbackEvaluation.cycle_id == cycle_id,
+        FeedbackQuestion.is_active == True
+    ).group_by(FeedbackQuestion.category).all()
     
-    categories = {}
-    for feedback in feedbacks:
-        if not feedback.question or not getattr(feedback.question, 'is_active', True):
-            continue
-        category = feedback.question.category
-        if category not in categories:
-            categories[category] = {'scores': [], 'comments': []}
-        if feedback.score is not None and not getattr(feedback.question, 'is_open_ended', True):
-            categories[category]['scores'].append(feedback.score)
-        if feedback.comment:
-            categories[category]['comments'].append(feedback.comment)
+    categories = {
+        category: {'comments': [], 'average': float(average) if count else 0, 'count': count}
+        for category, average, count in score_rows
+    }
     
-    # Calculate averages
-    for category in categories:
-        scores = categories[category]['scores']
-        categories[category]['average'] = sum(scores) / len(scores) if scores else 0
-        categories[category]['count'] = len(scores)
+    # Comments are fetched separately (only non-empty ones)
+    comment_rows = db.session.query(FeedbackQuestion.category, FeedbackEvaluation.comment).join(
+        FeedbackQuestion, FeedbackQuestion.question_id == FeedbackEvaluation.question_id
+    ).filter(
+        FeedbackEvaluation.evaluatee_id == employee_id,
+        FeedbackEvaluation.cycle_id == cycle_id,
+        FeedbackQuestion.is_active == True,
+        FeedbackEvaluation.comment.isnot(None),
+        FeedbackEvaluation.comment != ''
+    ).order_by(FeedbackQuestion.category, FeedbackEvaluation.feedback_id).all()
+    for category, comment in comment_rows:
+        categories[category]['comments'].append(comment)
     
     return categories
@@ -7,93 +7,148 @@ from models import (
     db, Employee, EvaluationCycle, FeedbackQuestion, FeedbackEvaluation, 
     RandomizationLog, KPI, Evaluation
 )
-from anonymization import hash_evaluator_id, hash_evaluator_metadata
+from anonymization import hash_evaluator_metadata, make_cycle_hasher
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 from datetime import datetime
 import json
 import random
+import numpy as np
 
-def get_realistic_360_scores():
-    """Generate realistic 360 feedback scores (1-5 scale)"""
-    # Slightly above average scores with some variation
-    base_score = random.uniform(3.5, 4.5)
-    variation = random.uniform(-0.5, 0.5)
-    score = max(1.0, min(5.0, base_score + variation))
-    return round(score, 1)
+# Print a line per question/assignment processed (otherwise one summary line per assignment)
+VERBOSE = False
 
-def get_realistic_kpi_scores():
-    """Generate realistic KPI scores (1-5 scale)"""
-    # Similar to 360 scores
-    base_score = random.uniform(3.5, 4.5)
-    variation = random.uniform(-0.5, 0.5)
-    score = max(1.0, min(5.0, base_score + variation))
-    return round(score, 1)
+# Rows fetched per round trip when streaming the larger result sets
+YIELD_PER = 500
 
-def get_strengths_comment():
-    """Generate realistic strengths comment"""
-    strengths = [
-        "Strong attention to detail and thorough in completing tasks. Very reliable and consistent in work quality.",
-        "Excellent communication skills and always willing to help colleagues. Great team player with positive attitude.",
-        "Proactive approach to problem-solving and takes initiative. Shows good understanding of department processes.",
-        "Dedicated and committed to meeting deadlines. Maintains high standards in all work assignments.",
-        "Good technical skills and adapts well to new systems. Collaborative and supportive team member."
-    ]
-    return random.choice(strengths)
+def draw_realistic_scores(n):
+    """Draw n realistic scores (1-5 scale) at once; slightly above average with some variation"""
+    base_scores = np.random.uniform(3.5, 4.5, n)
+    variations = np.random.uniform(-0.5, 0.5, n)
+    return np.clip(base_scores + variations, 1.0, 5.0).round(1).tolist()
 
-def get_improvements_comment():
-    """Generate realistic improvement areas comment"""
-    improvements = [
-        "Could benefit from taking on more leadership opportunities and mentoring junior colleagues.",
-        "Would benefit from more proactive communication about project status and potential challenges.",
-        "Could improve time management skills when handling multiple priorities simultaneously.",
-        "Would benefit from more cross-departmental collaboration to broaden perspective.",
-        "Could enhance presentation skills and confidence when presenting to larger groups."
-    ]
-    return random.choice(improvements)
+STRENGTHS_COMMENTS = [
+    "Strong attention to detail and thorough in completing tasks. Very reliable and consistent in work quality.",
+    "Excellent communication skills and always willing to help colleagues. Great team player with positive attitude.",
+    "Proactive approach to problem-solving and takes initiative. Shows good understanding of department processes.",
+    "Dedicated and committed to meeting deadlines. Maintains high standards in all work assignments.",
+    "Good technical skills and adapts well to new systems. Collaborative and supportive team member."
+]
 
-def complete_360_evaluations(employee_id):
-    """Complete all 360-degree feedback evaluations for employee_id"""
+IMPROVEMENTS_COMMENTS = [
+    "Could benefit from taking on more leadership opportunities and mentoring junior colleagues.",
+    "Would benefit from more proactive communication about project status and potential challenges.",
+    "Could improve time management skills when handling multiple priorities simultaneously.",
+    "Would benefit from more cross-departmental collaboration to broaden perspective.",
+    "Could enhance presentation skills and confidence when presenting to larger groups."
+]
+
+def draw_strengths_comments(n):
+    """Draw n realistic strengths comments at once"""
+    return random.choices(STRENGTHS_COMMENTS, k=n)
+
+def draw_improvements_comments(n):
+    """Draw n realistic improvement areas comments at once"""
+    return random.choices(IMPROVEMENTS_COMMENTS, k=n)
+
+def complete_360_evaluations(employee, cycles):
+    """Complete all 360-degree feedback evaluations for employee in the given active cycles"""
+    now = datetime.utcnow()  # One submission timestamp for every row written in this run
+    employee_id = employee.employee_id
     print(f"\n=== Completing 360-degree feedback evaluations for employee_id = {employee_id} ===")
     
-    # Get employee info
-    employee = Employee.query.get(employee_id)
-    if not employee:
-        print(f"Error: Employee with ID {employee_id} not found!")
-        return
-    
-    print(f"Employee: {employee.full_name} ({employee.role}, {employee.department})")
-    
     # Check if employee is a manager
     manager_roles = ['CEO', 'Technical Manager', 'Unit Manager', 'DP Supervisor', 
                      'Operations Manager', 'PM Manager', 'CFO', 'Field Manager', 'Project Manager']
     is_manager = employee.role in manager_roles
     
-    # Get all active cycles
-    cycles = EvaluationCycle.query.filter_by(status='active').all()
-    if not cycles:
-        print("No active evaluation cycles found!")
-        return
+    # Nothing to do if the employee has no 360 assignments in any active cycle
+    cycle_ids = [cycle.cycle_id for cycle in cycles]
+    assignment_count = db.session.query(func.count(RandomizationLog.log_id)).filter(
+        RandomizationLog.evaluatee_id == employee_id,
+        RandomizationLog.cycle_id.in_(cycle_ids),
+        RandomizationLog.evaluation_type == '360'
+    ).scalar()
+    if not assignment_count:
+        print("No 360-degree feedback assignments found in active cycles!")
+        return 0
+    
+    # Loaded once for all cycles: candidate evaluators, questions, assignments and existing answers.
+    # The larger scans are streamed and only load the columns used below.
+    employees_by_id = {
+        emp.employee_id: emp
+        for emp in Employee.query.filter_by(status='active').options(
+            load_only(Employee.employee_id, Employee.full_name, Employee.role, Employee.department)
+        ).yield_per(YIELD_PER)
+    }
+    
+    # Get all active feedback questions
+    all_questions = FeedbackQuestion.query.filter_by(is_active=True).all()
     
+    # Filter questions based on whether employee is a manager
+    questions = [q for q in all_questions if not q.is_for_managers or is_manager]
+    
+    # Open-ended "strengths" questions get a strengths comment; other open-ended ones get improvements
+    strengths_qids = {
+        q.question_id for q in questions
+        if q.is_open_ended and q.question_text.startswith("What are this employee's main strengths")
+    }
+    
+    assignments_by_cycle = {}
+    for assignment in RandomizationLog.query.filter(
+        RandomizationLog.evaluatee_id == employee_id,
+        RandomizationLog.cycle_id.in_(cycle_ids),
+        RandomizationLog.evaluation_type == '360'
+    ).options(
+        load_only(RandomizationLog.log_id, RandomizationLog.cycle_id, RandomizationLog.evaluator_hash)
+    ).yield_per(YIELD_PER):
+        assignments_by_cycle.setdefault(assignment.cycle_id, []).append(assignment)
+    
+    existing_by_assignment = {}
+    for feedback in FeedbackEvaluation.query.filter(
+        FeedbackEvaluation.evaluatee_id == employee_id,
+        FeedbackEvaluation.cycle_id.in_(cycle_ids)
+    ).options(
+        load_only(FeedbackEvaluation.feedback_id, FeedbackEvaluation.evaluator_hash, FeedbackEvaluation.cycle_id,
+                  FeedbackEvaluation.question_id, FeedbackEvaluation.status)
+    ).yield_per(YIELD_PER):
+        existing_by_assignment.setdefault((feedback.evaluator_hash, feedback.cycle_id), []).append(feedback)
+    
+    # Rows are written in bulk after the loops (plain dicts, no per-instance unit-of-work tracking)
+    new_feedbacks = []
+    feedback_updates = []
     total_completed = 0
     
     for cycle in cycles:
         print(f"\nProcessing cycle: {cycle.name} (ID: {cycle.cycle_id})")
         
-        # Get all 360 assignments for this employee in this cycle
-        assignments = RandomizationLog.query.filter_by(
-            evaluatee_id=employee_id,
-            cycle_id=cycle.cycle_id,
-            evaluation_type='360'
-        ).all()
+        # All 360 assignments for this employee in this cycle
+        assignments = assignments_by_cycle.get(cycle.cycle_id, [])
         
         print(f"Found {len(assignments)} 360-degree feedback assignments")
         
-        # Get all active feedback questions
-        all_questions = FeedbackQuestion.query.filter_by(is_active=True).all()
+        print(f"Total questions to answer: {len(questions)} (including {sum(1 for q in questions if q.is_open_ended)} open-ended)")
         
-        # Filter questions based on whether employee is a manager
-        questions = [q for q in all_questions if not q.is_for_managers or is_manager]
+        # Enough scores for every scored question of every assignment, drawn in one call
+        score_pool = iter(draw_realistic_scores(sum(1 for q in questions if not q.is_open_ended) * len(assignments)))
+        # Open-ended comments are drawn the same way, one pool per kind
+        n_strengths = len(strengths_qids)
+        n_improvements = sum(1 for q in questions if q.is_open_ended) - n_strengths
+        strengths_pool = iter(draw_strengths_comments(n_strengths * len(assignments)))
+        improvements_pool = iter(draw_improvements_comments(n_improvements * len(assignments)))
         
-        print(f"Total questions to answer: {len(questions)} (including {sum(1 for q in questions if q.is_open_ended)} open-ended)")
+        # Reverse map of evaluator hashes for this cycle; stop hashing once every
+        # hash used by these assignments has been matched to an employee
+        wanted_hashes = {a.evaluator_hash for a in assignments if a.evaluator_hash}
+        hash_to_emp = {}
+        if wanted_hashes:
+            hash_for_cycle = make_cycle_hasher(cycle.cycle_id)
+            for emp_id, emp in employees_by_id.items():
+                evaluator_hash = hash_for_cycle(emp_id)
+                if evaluator_hash in wanted_hashes:
+                    hash_to_emp[evaluator_hash] = emp
+                    if len(hash_to_emp) == len(wanted_hashes):
+                        break
         
         for assignment in assignments:
             # Get evaluator hash from assignment
@@ -113,160 +168,181 @@ def complete_360_evaluations(employee_id):
             # We can't easily reverse it, but we can check if evaluations already exist
             
             # Check existing evaluations for this assignment
-            existing_evaluations = FeedbackEvaluation.query.filter_by(
-                evaluator_hash=evaluator_hash,
-                evaluatee_id=employee_id,
-                cycle_id=cycle.cycle_id
-            ).all()
+            existing_evaluations = existing_by_assignment.get((evaluator_hash, cycle.cycle_id), [])
             
-            existing_question_ids = {e.question_id for e in existing_evaluations}
+            existing_by_qid = {}
+            for e in existing_evaluations:
+                existing_by_qid.setdefault(e.question_id, e)  # first row wins, as the old next() scan did
+            existing_question_ids = set(existing_by_qid)
             
-            # Find which evaluator this hash belongs to by checking all employees
-            # This is a bit inefficient but necessary since we can't reverse the hash
-            evaluator = None
-            for emp in Employee.query.filter_by(status='active').all():
-                test_hash = hash_evaluator_id(emp.employee_id, cycle.cycle_id)
-                if test_hash == evaluator_hash:
-                    evaluator = emp
-                    break
+            # Find which evaluator this hash belongs to (hash can't be reversed; use the per-cycle map)
+            evaluator = hash_to_emp.get(evaluator_hash)
             
             if not evaluator:
                 print(f"  Warning: Could not find evaluator for hash {evaluator_hash[:16]}..., skipping...")
                 continue
             
-            print(f"  Processing evaluation from evaluator: {evaluator.full_name} ({evaluator.role})")
+            if VERBOSE:
+                print(f"  Processing evaluation from evaluator: {evaluator.full_name} ({evaluator.role})")
             
             # Determine if evaluator is manager of evaluatee
             is_evaluator_manager = (evaluator.employee_id == employee.manager_id)
             
+            # Metadata hashes are the same for every question of this assignment
+            department_hash = hash_evaluator_metadata(evaluator.employee_id, cycle.cycle_id, 'department', evaluator.department)
+            role_hash = hash_evaluator_metadata(evaluator.employee_id, cycle.cycle_id, 'role', evaluator.role)
+            is_manager_hash = hash_evaluator_metadata(evaluator.employee_id, cycle.cycle_id, 'is_manager', str(is_evaluator_manager))
+            
+            # Columns shared by every new row of this assignment
+            feedback_template = {
+                'evaluator_hash': evaluator_hash,
+                'evaluatee_id': employee_id,
+                'cycle_id': cycle.cycle_id,
+                'status': 'submitted',
+                'submitted_at': now,
+                'evaluator_department_hash': department_hash,
+                'evaluator_role_hash': role_hash,
+                'is_manager_hash': is_manager_hash
+            }
+            
             # Create/update evaluations for each question
+            created_count = updated_count = 0
             for question in questions:
                 if question.question_id in existing_question_ids:
                     # Update existing evaluation
-                    existing = next(e for e in existing_evaluations if e.question_id == question.question_id)
+                    existing = existing_by_qid[question.question_id]
                     if existing.status != 'submitted':
                         # Update with realistic data
+                        update = {'feedback_id': existing.feedback_id}
                         if question.is_open_ended:
-                            if question.question_text.startswith("What are this employee's main strengths"):
-                                existing.comment = get_strengths_comment()
+                            if question.question_id in strengths_qids:
+                                update['comment'] = next(strengths_pool)
                             else:
-                                existing.comment = get_improvements_comment()
-                            existing.score = None
+                                update['comment'] = next(improvements_pool)
+                            update['score'] = None
                         else:
-                            existing.score = get_realistic_360_scores()
+                            update['score'] = next(score_pool)
                             # Add occasional comment
                             if random.random() < 0.3:  # 30% chance of comment
-                                existing.comment = f"Good performance in this area."
+                                update['comment'] = f"Good performance in this area."
                         
-                        existing.status = 'submitted'
-                        existing.submitted_at = datetime.utcnow()
-                        print(f"    Updated question {question.question_id}: {question.question_text[:50]}...")
+                        update['status'] = 'submitted'
+                        update['submitted_at'] = now
+                        feedback_updates.append(update)
+                        updated_count += 1
+                        if VERBOSE:
+                            print(f"    Updated question {question.question_id}: {question.question_text[:50]}...")
                 else:
                     # Create new evaluation
                     if question.is_open_ended:
-                        if question.question_text.startswith("What are this employee's main strengths"):
-                            comment = get_strengths_comment()
+                        score = None
+                        if question.question_id in strengths_qids:
+                            comment = next(strengths_pool)
                         else:
-                            comment = get_improvements_comment()
-                        
-                        feedback = FeedbackEvaluation(
-                            evaluator_hash=evaluator_hash,
-                            evaluatee_id=employee_id,
-                            cycle_id=cycle.cycle_id,
-                            question_id=question.question_id,
-                            score=None,
-                            comment=comment,
-                            status='submitted',
-                            submitted_at=datetime.utcnow(),
-                            evaluator_department_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'department', evaluator.department
-                            ),
-                            evaluator_role_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'role', evaluator.role
-                            ),
-                            is_manager_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'is_manager', str(is_evaluator_manager)
-                            )
-                        )
+                            comment = next(improvements_pool)
                     else:
-                        score = get_realistic_360_scores()
+                        score = next(score_pool)
                         comment = None
                         if random.random() < 0.3:  # 30% chance of comment
                             comment = f"Consistent performance in this area."
-                        
-                        feedback = FeedbackEvaluation(
-                            evaluator_hash=evaluator_hash,
-                            evaluatee_id=employee_id,
-                            cycle_id=cycle.cycle_id,
-                            question_id=question.question_id,
-                            score=score,
-                            comment=comment,
-                            status='submitted',
-                            submitted_at=datetime.utcnow(),
-                            evaluator_department_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'department', evaluator.department
-                            ),
-                            evaluator_role_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'role', evaluator.role
-                            ),
-                            is_manager_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'is_manager', str(is_evaluator_manager)
-                            )
-                        )
                     
-                    db.session.add(feedback)
-                    print(f"    Created question {question.question_id}: {question.question_text[:50]}...")
+                    feedback = dict(
+                        feedback_template,
+                        question_id=question.question_id,
+                        score=score,
+                        comment=comment
+                    )
+                    new_feedbacks.append(feedback)
+                    created_count += 1
+                    if VERBOSE:
+                        print(f"    Created question {question.question_id}: {question.question_text[:50]}...")
             
+            print(f"  {evaluator.full_name}: {created_count} created, {updated_count} updated")
             total_completed += 1
     
+    if feedback_updates:
+        db.session.bulk_update_mappings(FeedbackEvaluation, feedback_updates)
+    if new_feedbacks:
+        db.session.bulk_insert_mappings(FeedbackEvaluation, new_feedbacks)
+    
     print(f"\nCompleted {total_completed} 360-degree feedback evaluations")
     return total_completed
 
-def complete_kpi_evaluations(employee_id):
-    """Complete all KPI evaluations for employee_id"""
+def complete_kpi_evaluations(employee, cycles):
+    """Complete all KPI evaluations for employee in the given active cycles"""
+    now = datetime.utcnow()  # One submission timestamp for every row written in this run
+    employee_id = employee.employee_id
     print(f"\n=== Completing KPI evaluations for employee_id = {employee_id} ===")
     
-    # Get employee info
-    employee = Employee.query.get(employee_id)
-    if not employee:
-        print(f"Error: Employee with ID {employee_id} not found!")
-        return
+    # Nothing to do if the employee has no kpi assignments in any active cycle
+    cycle_ids = [cycle.cycle_id for cycle in cycles]
+    assignment_count = db.session.query(func.count(RandomizationLog.log_id)).filter(
+        RandomizationLog.evaluatee_id == employee_id,
+        RandomizationLog.cycle_id.in_(cycle_ids),
+        RandomizationLog.evaluation_type == 'kpi'
+    ).scalar()
+    if not assignment_count:
+        print("No KPI evaluation assignments found in active cycles!")
+        return 0
+    
+    # Get relevant KPIs for this employee (same for every cycle)
+    # KPIs can be department-specific, role-specific, or global
+    kpis = KPI.query.filter_by(is_active=True).filter(
+        db.or_(
+            KPI.department == None,  # Global KPIs
+            KPI.department == employee.department,  # Department-specific
+            KPI.role == None,  # All roles
+            KPI.role == employee.role  # Role-specific
+        )
+    ).all()
+    
+    kpi_ids = [kpi.kpi_id for kpi in kpis]
+    
+    # Assignments, evaluators and existing evaluations for all cycles, one query each
+    assignments_by_cycle = {}
+    for assignment in RandomizationLog.query.filter(
+        RandomizationLog.evaluatee_id == employee_id,
+        RandomizationLog.cycle_id.in_(cycle_ids),
+        RandomizationLog.evaluation_type == 'kpi'
+    ).options(
+        load_only(RandomizationLog.log_id, RandomizationLog.cycle_id, RandomizationLog.evaluator_id)
+    ).yield_per(YIELD_PER):
+        assignments_by_cycle.setdefault(assignment.cycle_id, []).append(assignment)
     
-    print(f"Employee: {employee.full_name} ({employee.role}, {employee.department})")
+    evaluator_ids = {a.evaluator_id for rows in assignments_by_cycle.values() for a in rows if a.evaluator_id}
+    evaluators_by_id = {
+        emp.employee_id: emp
+        for emp in Employee.query.filter(Employee.employee_id.in_(list(evaluator_ids))).all()
+    } if evaluator_ids else {}
     
-    # Get all active cycles
-    cycles = EvaluationCycle.query.filter_by(status='active').all()
-    if not cycles:
-        print("No active evaluation cycles found!")
-        return
+    existing_by_key = {
+        (e.evaluator_id, e.cycle_id): e
+        for e in Evaluation.query.filter(
+            Evaluation.evaluatee_id == employee_id,
+            Evaluation.cycle_id.in_(cycle_ids)
+        ).options(
+            load_only(Evaluation.evaluation_id, Evaluation.evaluator_id, Evaluation.cycle_id)
+        ).order_by(Evaluation.evaluation_id.desc()).yield_per(YIELD_PER)
+    }
     
+    # Rows are written in bulk after the loop
+    new_evaluations = []
+    evaluation_updates = []
     total_completed = 0
     
     for cycle in cycles:
         print(f"\nProcessing cycle: {cycle.name} (ID: {cycle.cycle_id})")
         
-        # Get all KPI assignments for this employee in this cycle
-        assignments = RandomizationLog.query.filter_by(
-            evaluatee_id=employee_id,
-            cycle_id=cycle.cycle_id,
-            evaluation_type='kpi'
-        ).all()
+        # All KPI assignments for this employee in this cycle
+        assignments = assignments_by_cycle.get(cycle.cycle_id, [])
         
         print(f"Found {len(assignments)} KPI evaluation assignments")
         
-        # Get relevant KPIs for this employee
-        # KPIs can be department-specific, role-specific, or global
-        kpis = KPI.query.filter_by(is_active=True).filter(
-            db.or_(
-                KPI.department == None,  # Global KPIs
-                KPI.department == employee.department,  # Department-specific
-                KPI.role == None,  # All roles
-                KPI.role == employee.role  # Role-specific
-            )
-        ).all()
-        
         print(f"Total KPIs to evaluate: {len(kpis)}")
         
+        # Scores for every KPI of every assignment, drawn in one call
+        score_pool = iter(draw_realistic_scores(len(kpi_ids) * len(assignments)))
+        
         for assignment in assignments:
             evaluator_id = assignment.evaluator_id
             
@@ -274,51 +350,53 @@ def complete_kpi_evaluations(employee_id):
                 print(f"  Warning: Assignment {assignment.log_id} has no evaluator_id, skipping...")
                 continue
             
-            evaluator = Employee.query.get(evaluator_id)
+            evaluator = evaluators_by_id.get(evaluator_id)
             if not evaluator:
                 print(f"  Warning: Evaluator with ID {evaluator_id} not found, skipping...")
                 continue
             
-            print(f"  Processing evaluation from evaluator: {evaluator.full_name} ({evaluator.role})")
+            if VERBOSE:
+                print(f"  Processing evaluation from evaluator: {evaluator.full_name} ({evaluator.role})")
             
             # Check if evaluation already exists
-            existing_evaluation = Evaluation.query.filter_by(
-                evaluator_id=evaluator_id,
-                evaluatee_id=employee_id,
-                cycle_id=cycle.cycle_id
-            ).first()
+            existing_evaluation = existing_by_key.get((evaluator_id, cycle.cycle_id))
             
-            # Generate realistic scores for all KPIs
-            scores = {}
-            for kpi in kpis:
-                scores[kpi.kpi_id] = get_realistic_kpi_scores()
+            # Realistic scores for all KPIs (from the per-cycle pool)
+            scores = {kpi_id: next(score_pool) for kpi_id in kpi_ids}
             
             # Generate realistic comments
             comments = f"Overall good performance across all KPIs. {employee.full_name} demonstrates consistent effort and meets most expectations. Some areas show strong performance, while others have room for improvement."
             
             if existing_evaluation:
                 # Update existing evaluation
-                existing_evaluation.scores = json.dumps(scores)
-                existing_evaluation.comments = comments
-                existing_evaluation.status = 'pending_review'
-                existing_evaluation.submitted_at = datetime.utcnow()
-                print(f"    Updated KPI evaluation with {len(scores)} KPIs")
+                evaluation_updates.append({
+                    'evaluation_id': existing_evaluation.evaluation_id,
+                    'scores': json.dumps(scores, separators=(',', ':')),
+                    'comments': comments,
+                    'status': 'pending_review',
+                    'submitted_at': now
+                })
+                print(f"  {evaluator.full_name}: updated KPI evaluation with {len(scores)} KPIs")
             else:
                 # Create new evaluation
-                evaluation = Evaluation(
-                    evaluator_id=evaluator_id,
-                    evaluatee_id=employee_id,
-                    cycle_id=cycle.cycle_id,
-                    scores=json.dumps(scores),
-                    comments=comments,
-                    status='pending_review',
-                    submitted_at=datetime.utcnow()
-                )
-                db.session.add(evaluation)
-                print(f"    Created KPI evaluation with {len(scores)} KPIs")
+                new_evaluations.append({
+                    'evaluator_id': evaluator_id,
+                    'evaluatee_id': employee_id,
+                    'cycle_id': cycle.cycle_id,
+                    'scores': json.dumps(scores, separators=(',', ':')),
+                    'comments': comments,
+                    'status': 'pending_review',
+                    'submitted_at': now
+                })
+                print(f"  {evaluator.full_name}: created KPI evaluation with {len(scores)} KPIs")
             
             total_completed += 1
     
+    if evaluation_updates:
+        db.session.bulk_update_mappings(Evaluation, evaluation_updates)
+    if new_evaluations:
+        db.session.bulk_insert_mappings(Evaluation, new_evaluations)
+    
     print(f"\nCompleted {total_completed} KPI evaluations")
     return total_completed
 
@@ -331,11 +409,24 @@ def main():
         print(f"Completing all evaluations for employee_id = {employee_id}")
         print("=" * 80)
         
+        # Employee and active cycles are shared by both completion steps
+        employee = Employee.query.get(employee_id)
+        if not employee:
+            print(f"Error: Employee with ID {employee_id} not found!")
+            return
+        
+        print(f"Employee: {employee.full_name} ({employee.role}, {employee.department})")
+        
+        cycles = EvaluationCycle.query.filter_by(status='active').all()
+        if not cycles:
+            print("No active evaluation cycles found!")
+            return
+        
         # Complete 360-degree feedback evaluations
-        count_360 = complete_360_evaluations(employee_id)
+        count_360 = complete_360_evaluations(employee, cycles)
         
         # Complete KPI evaluations
-        count_kpi = complete_kpi_evaluations(employee_id)
+        count_kpi = complete_kpi_evaluations(employee, cycles)
         
         # Commit all changes
         try:
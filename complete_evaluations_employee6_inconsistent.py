@@ -7,14 +7,15 @@ from models import (
     db, Employee, EvaluationCycle, FeedbackQuestion, FeedbackEvaluation, 
     RandomizationLog, KPI, Evaluation
 )
-from anonymization import hash_evaluator_id, hash_evaluator_metadata
+from anonymization import hash_evaluator_ids_batch, hash_evaluator_metadata
 from datetime import datetime, timedelta
 import json
 import random
+import numpy as np
 
-def get_inconsistent_360_scores(evaluator_index, total_evaluators):
+def draw_inconsistent_360_scores(evaluator_index, total_evaluators, n):
     """
-    Generate inconsistent scores - some evaluators give high scores, others give low scores
+    Draw n inconsistent scores for one evaluator at once - some evaluators give high scores, others give low scores
     This creates high variance/inconsistency in the evaluation
     """
     # Distribute evaluators: some give high scores (4-5), some give low scores (1-2.5), some give medium (2.5-3.5)
@@ -22,54 +23,54 @@ def get_inconsistent_360_scores(evaluator_index, total_evaluators):
     
     # Split evaluators into groups for maximum inconsistency
     if evaluator_index < total_evaluators * 0.3:  # First 30% give very high scores
-        base_score = random.uniform(4.2, 5.0)
+        base_scores = np.random.uniform(4.2, 5.0, n)
     elif evaluator_index < total_evaluators * 0.6:  # Next 30% give very low scores
-        base_score = random.uniform(1.0, 2.3)
-    else:  # Remaining 40% give mixed scores (some high, some low)
-        if random.random() < 0.5:
-            base_score = random.uniform(3.8, 4.5)  # High
-        else:
-            base_score = random.uniform(2.0, 3.0)  # Low-medium
+        base_scores = np.random.uniform(1.0, 2.3, n)
+    else:  # Remaining 40% give mixed scores (some high, some low), chosen per score
+        high = np.random.random(n) < 0.5
+        base_scores = np.random.uniform(np.where(high, 3.8, 2.0), np.where(high, 4.5, 3.0))
     
-    variation = random.uniform(-0.3, 0.3)
-    score = max(1.0, min(5.0, base_score + variation))
-    return round(score, 1)
+    variations = np.random.uniform(-0.3, 0.3, n)
+    return np.clip(base_scores + variations, 1.0, 5.0).round(1).tolist()
 
-def get_inconsistent_kpi_scores():
-    """Generate inconsistent KPI scores with high variance"""
+def draw_inconsistent_kpi_scores(n):
+    """Draw n inconsistent KPI scores with high variance at once"""
     # Mix of high and low scores for inconsistency
-    if random.random() < 0.4:  # 40% chance of high score
-        base_score = random.uniform(4.0, 5.0)
-    elif random.random() < 0.7:  # 30% chance of low score
-        base_score = random.uniform(1.0, 2.5)
-    else:  # 30% chance of medium score
-        base_score = random.uniform(2.5, 3.5)
+    high = np.random.random(n) < 0.4  # 40% chance of high score
+    low = ~high & (np.random.random(n) < 0.7)  # 30% chance of low score
+    # Remaining 30% get a medium score
+    lows = np.select([high, low], [4.0, 1.0], 2.5)
+    highs = np.select([high, low], [5.0, 2.5], 3.5)
+    base_scores = np.random.uniform(lows, highs)
     
-    variation = random.uniform(-0.3, 0.3)
-    score = max(1.0, min(5.0, base_score + variation))
-    return round(score, 1)
+    variations = np.random.uniform(-0.3, 0.3, n)
+    return np.clip(base_scores + variations, 1.0, 5.0).round(1).tolist()
 
-def get_strengths_comment_inconsistent():
-    """Generate mixed strengths comments - some positive, some critical"""
-    strengths = [
-        "Strong attention to detail and thorough in completing tasks. Very reliable and consistent in work quality.",
-        "Excellent communication skills and always willing to help colleagues. Great team player with positive attitude.",
-        "Shows potential but needs more experience. Sometimes struggles with complex tasks but willing to learn.",
-        "Inconsistent performance - excellent on some days but needs improvement on others. Has good technical skills.",
-        "Good understanding of processes but execution can be variable. Shows promise when focused."
-    ]
-    return random.choice(strengths)
+# Mixed strengths comments - some positive, some critical
+STRENGTHS_COMMENTS_INCONSISTENT = [
+    "Strong attention to detail and thorough in completing tasks. Very reliable and consistent in work quality.",
+    "Excellent communication skills and always willing to help colleagues. Great team player with positive attitude.",
+    "Shows potential but needs more experience. Sometimes struggles with complex tasks but willing to learn.",
+    "Inconsistent performance - excellent on some days but needs improvement on others. Has good technical skills.",
+    "Good understanding of processes but execution can be variable. Shows promise when focused."
+]
 
-def get_improvements_comment_inconsistent():
-    """Generate improvement comments reflecting inconsistency"""
-    improvements = [
-        "Needs to improve consistency in work quality. Performance varies significantly between tasks.",
-        "Would benefit from better time management and prioritization. Sometimes misses deadlines.",
-        "Could improve communication - sometimes unclear about project status and challenges.",
-        "Needs to take more ownership of responsibilities. Relies too much on others for guidance.",
-        "Should work on maintaining consistent quality standards across all assignments."
-    ]
-    return random.choice(improvements)
+# Improvement comments reflecting inconsistency
+IMPROVEMENTS_COMMENTS_INCONSISTENT = [
+    "Needs to improve consistency in work quality. Performance varies significantly between tasks.",
+    "Would benefit from better time management and prioritization. Sometimes misses deadlines.",
+    "Could improve communication - sometimes unclear about project status and challenges.",
+    "Needs to take more ownership of responsibilities. Relies too much on others for guidance.",
+    "Should work on maintaining consistent quality standards across all assignments."
+]
+
+def draw_strengths_comments_inconsistent(n):
+    """Draw n mixed strengths comments at once"""
+    return random.choices(STRENGTHS_COMMENTS_INCONSISTENT, k=n)
+
+def draw_improvements_comments_inconsistent(n):
+    """Draw n improvement comments at once"""
+    return random.choices(IMPROVEMENTS_COMMENTS_INCONSISTENT, k=n)
 
 def complete_360_evaluations_inconsistent(employee_id):
     """Complete all 360-degree feedback evaluations with high inconsistency"""
@@ -94,6 +95,23 @@ def complete_360_evaluations_inconsistent(employee_id):
         print("No active evaluation cycles found!")
         return
     
+    # Candidate evaluators, loaded once for all cycles
+    employees_by_id = {emp.employee_id: emp for emp in Employee.query.filter_by(status='active').all()}
+    
+    # Get all active feedback questions (same for every cycle)
+    all_questions = FeedbackQuestion.query.filter_by(is_active=True).all()
+    questions = [q for q in all_questions if not q.is_for_managers or is_manager]
+    
+    # Open-ended "strengths" questions get a strengths comment; other open-ended ones get improvements
+    strengths_qids = {
+        q.question_id for q in questions
+        if q.is_open_ended and q.question_text.startswith("What are this employee's main strengths")
+    }
+    n_open_ended = sum(1 for q in questions if q.is_open_ended)
+    n_scored = len(questions) - n_open_ended
+    
+    # New rows are inserted in bulk after the loops
+    new_feedbacks = []
     total_completed = 0
     
     for cycle in cycles:
@@ -112,12 +130,28 @@ def complete_360_evaluations_inconsistent(employee_id):
         
         print(f"Found {len(assignments)} 360-degree feedback assignments")
         
-        # Get all active feedback questions
-        all_questions = FeedbackQuestion.query.filter_by(is_active=True).all()
-        questions = [q for q in all_questions if not q.is_for_managers or is_manager]
-        
         print(f"Total questions to answer: {len(questions)}")
         
+        # Reverse map of evaluator hashes for this cycle: one hash per active employee
+        hash_to_emp = {
+            evaluator_hash: employees_by_id[emp_id]
+            for emp_id, evaluator_hash in hash_evaluator_ids_batch(employees_by_id, cycle.cycle_id).items()
+        }
+        
+        # Existing answers for this employee and cycle, grouped by evaluator hash
+        existing_by_hash = {}
+        for feedback in FeedbackEvaluation.query.filter_by(
+            evaluatee_id=employee_id,
+            cycle_id=cycle.cycle_id
+        ).all():
+            existing_by_hash.setdefault(feedback.evaluator_hash, []).append(feedback)
+        
+        # Open-ended comments for every assignment of this cycle, drawn in one call per kind
+        n_strengths = len(strengths_qids)
+        n_improvements = n_open_ended - n_strengths
+        strengths_pool = iter(draw_strengths_comments_inconsistent(n_strengths * len(assignments)))
+        improvements_pool = iter(draw_improvements_comments_inconsistent(n_improvements * len(assignments)))
+        
         # Track evaluator index for inconsistency distribution
         evaluator_index = 0
         
@@ -129,12 +163,7 @@ def complete_360_evaluations_inconsistent(employee_id):
                 continue
             
             # Find the actual evaluator
-            evaluator = None
-            for emp in Employee.query.filter_by(status='active').all():
-                test_hash = hash_evaluator_id(emp.employee_id, cycle.cycle_id)
-                if test_hash == evaluator_hash:
-                    evaluator = emp
-                    break
+            evaluator = hash_to_emp.get(evaluator_hash)
             
             if not evaluator:
                 print(f"  Warning: Could not find evaluator for hash {evaluator_hash[:16]}..., skipping...")
@@ -145,15 +174,21 @@ def complete_360_evaluations_inconsistent(employee_id):
             # Determine if evaluator is manager of evaluatee
             is_evaluator_manager = (evaluator.employee_id == employee.manager_id)
             
+            # Metadata hashes are the same for every question of this assignment
+            department_hash = hash_evaluator_metadata(evaluator.employee_id, cycle.cycle_id, 'department', evaluator.department)
+            role_hash = hash_evaluator_metadata(evaluator.employee_id, cycle.cycle_id, 'role', evaluator.role)
+            is_manager_hash = hash_evaluator_metadata(evaluator.employee_id, cycle.cycle_id, 'is_manager', str(is_evaluator_manager))
+            
             # Check existing evaluations
-            existing_evaluations = FeedbackEvaluation.query.filter_by(
-                evaluator_hash=evaluator_hash,
-                evaluatee_id=employee_id,
-                cycle_id=cycle.cycle_id
-            ).all()
+            existing_evaluations = existing_by_hash.get(evaluator_hash, [])
             
             existing_question_ids = {e.question_id for e in existing_evaluations}
             
+            # INCONSISTENT scores for every scored question of this evaluator, drawn in one call,
+            # plus whether each scored answer gets a short comment (40% chance)
+            score_pool = iter(draw_inconsistent_360_scores(evaluator_index, len(assignments), n_scored))
+            comment_flags = iter((np.random.random(n_scored) < 0.4).tolist())
+            
             # Create/update evaluations for each question with INCONSISTENT scores
             for question in questions:
                 if question.question_id in existing_question_ids:
@@ -161,15 +196,15 @@ def complete_360_evaluations_inconsistent(employee_id):
                     existing = next(e for e in existing_evaluations if e.question_id == question.question_id)
                     if existing.status != 'submitted':
                         if question.is_open_ended:
-                            if question.question_text.startswith("What are this employee's main strengths"):
-                                existing.comment = get_strengths_comment_inconsistent()
+                            if question.question_id in strengths_qids:
+                                existing.comment = next(strengths_pool)
                             else:
-                                existing.comment = get_improvements_comment_inconsistent()
+                                existing.comment = next(improvements_pool)
                             existing.score = None
                         else:
                             # Use inconsistent scoring based on evaluator position
-                            existing.score = get_inconsistent_360_scores(evaluator_index, len(assignments))
-                            if random.random() < 0.4:
+                            existing.score = next(score_pool)
+                            if next(comment_flags):
                                 existing.comment = f"Variable performance in this area."
                         
                         existing.status = 'submitted'
@@ -177,12 +212,12 @@ def complete_360_evaluations_inconsistent(employee_id):
                 else:
                     # Create new evaluation with INCONSISTENT scores
                     if question.is_open_ended:
-                        if question.question_text.startswith("What are this employee's main strengths"):
-                            comment = get_strengths_comment_inconsistent()
+                        if question.question_id in strengths_qids:
+                            comment = next(strengths_pool)
                         else:
-                            comment = get_improvements_comment_inconsistent()
+                            comment = next(improvements_pool)
                         
-                        feedback = FeedbackEvaluation(
+                        feedback = dict(
                             evaluator_hash=evaluator_hash,
                             evaluatee_id=employee_id,
                             cycle_id=cycle.cycle_id,
@@ -191,24 +226,18 @@ def complete_360_evaluations_inconsistent(employee_id):
                             comment=comment,
                             status='submitted',
                             submitted_at=recent_date,
-                            evaluator_department_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'department', evaluator.department
-                            ),
-                            evaluator_role_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'role', evaluator.role
-                            ),
-                            is_manager_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'is_manager', str(is_evaluator_manager)
-                            )
+                            evaluator_department_hash=department_hash,
+                            evaluator_role_hash=role_hash,
+                            is_manager_hash=is_manager_hash
                         )
                     else:
                         # Generate INCONSISTENT score based on evaluator position
-                        score = get_inconsistent_360_scores(evaluator_index, len(assignments))
+                        score = next(score_pool)
                         comment = None
-                        if random.random() < 0.4:
+                        if next(comment_flags):
                             comment = f"Performance varies in this area."
                         
-                        feedback = FeedbackEvaluation(
+                        feedback = dict(
                             evaluator_hash=evaluator_hash,
                             evaluatee_id=employee_id,
                             cycle_id=cycle.cycle_id,
@@ -217,22 +246,19 @@ def complete_360_evaluations_inconsistent(employee_id):
                             comment=comment,
                             status='submitted',
                             submitted_at=recent_date,
-                            evaluator_department_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'department', evaluator.department
-                            ),
-                            evaluator_role_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'role', evaluator.role
-                            ),
-                            is_manager_hash=hash_evaluator_metadata(
-                                evaluator.employee_id, cycle.cycle_id, 'is_manager', str(is_evaluator_manager)
-                            )
+                            evaluator_department_hash=department_hash,
+                            evaluator_role_hash=role_hash,
+                            is_manager_hash=is_manager_hash
                         )
                     
-                    db.session.add(feedback)
+                    new_feedbacks.append(feedback)
             
             evaluator_index += 1
             total_completed += 1
     
+    if new_feedbacks:
+        db.session.bulk_insert_mappings(FeedbackEvaluation, new_feedbacks)
+    
     print(f"\nCompleted {total_completed} 360-degree feedback evaluations with HIGH INCONSISTENCY")
     return total_completed
 
@@ -254,6 +280,9 @@ def complete_kpi_evaluations_inconsistent(employee_id):
         print("No active evaluation cycles found!")
         return
     
+    # New rows are inserted and existing rows updated in bulk after the loop
+    new_evaluations = []
+    evaluation_updates = []
     total_completed = 0
     
     for cycle in cycles:
@@ -279,6 +308,23 @@ def complete_kpi_evaluations_inconsistent(employee_id):
         ).all()
         
         print(f"Total KPIs to evaluate: {len(kpis)}")
+        kpi_ids = [kpi.kpi_id for kpi in kpis]
+        
+        # All evaluators of this cycle's assignments in one query
+        evaluator_ids = {a.evaluator_id for a in assignments if a.evaluator_id}
+        evaluators_by_id = {
+            emp.employee_id: emp
+            for emp in Employee.query.filter(Employee.employee_id.in_(list(evaluator_ids))).all()
+        } if evaluator_ids else {}
+        
+        # Existing evaluations for this cycle in one query (descending, so the lowest id wins as .first() did)
+        existing_by_key = {
+            (e.evaluator_id, e.evaluatee_id): e
+            for e in Evaluation.query.filter_by(
+                evaluatee_id=employee_id,
+                cycle_id=cycle.cycle_id
+            ).order_by(Evaluation.evaluation_id.desc()).all()
+        }
         
         for assignment in assignments:
             evaluator_id = assignment.evaluator_id
@@ -287,7 +333,7 @@ def complete_kpi_evaluations_inconsistent(employee_id):
                 print(f"  Warning: Assignment {assignment.log_id} has no evaluator_id, skipping...")
                 continue
             
-            evaluator = Employee.query.get(evaluator_id)
+            evaluator = evaluators_by_id.get(evaluator_id)
             if not evaluator:
                 print(f"  Warning: Evaluator with ID {evaluator_id} not found, skipping...")
                 continue
@@ -295,30 +341,27 @@ def complete_kpi_evaluations_inconsistent(employee_id):
             print(f"  Processing evaluation from evaluator: {evaluator.full_name} ({evaluator.role})")
             
             # Check if evaluation already exists
-            existing_evaluation = Evaluation.query.filter_by(
-                evaluator_id=evaluator_id,
-                evaluatee_id=employee_id,
-                cycle_id=cycle.cycle_id
-            ).first()
+            existing_evaluation = existing_by_key.get((evaluator_id, employee_id))
             
             # Generate INCONSISTENT scores for all KPIs (mix of high and low)
-            scores = {}
-            for kpi in kpis:
-                scores[kpi.kpi_id] = get_inconsistent_kpi_scores()
+            scores = dict(zip(kpi_ids, draw_inconsistent_kpi_scores(len(kpi_ids))))
             
             # Generate comments reflecting inconsistency
             comments = f"Performance shows significant variation across KPIs. Some areas demonstrate strong performance while others need substantial improvement. Consistency in work quality and execution is the main area requiring attention."
             
             if existing_evaluation:
                 # Update existing evaluation
-                existing_evaluation.scores = json.dumps(scores)
-                existing_evaluation.comments = comments
-                existing_evaluation.status = 'pending_review'
-                existing_evaluation.submitted_at = datetime.utcnow()
+                evaluation_updates.append(dict(
+                    evaluation_id=existing_evaluation.evaluation_id,
+                    scores=json.dumps(scores),
+                    comments=comments,
+                    status='pending_review',
+                    submitted_at=datetime.utcnow()
+                ))
                 print(f"    Updated KPI evaluation with {len(scores)} KPIs (INCONSISTENT scores)")
             else:
                 # Create new evaluation
-                evaluation = Evaluation(
+                new_evaluations.append(dict(
                     evaluator_id=evaluator_id,
                     evaluatee_id=employee_id,
                     cycle_id=cycle.cycle_id,
@@ -326,12 +369,16 @@ def complete_kpi_evaluations_inconsistent(employee_id):
                     comments=comments,
                     status='pending_review',
                     submitted_at=datetime.utcnow()
-                )
-                db.session.add(evaluation)
+                ))
                 print(f"    Created KPI evaluation with {len(scores)} KPIs (INCONSISTENT scores)")
             
             total_completed += 1
     
+    if evaluation_updates:
+        db.session.bulk_update_mappings(Evaluation, evaluation_updates)
+    if new_evaluations:
+        db.session.bulk_insert_mappings(Evaluation, new_evaluations)
+    
     print(f"\nCompleted {total_completed} KPI evaluations with HIGH INCONSISTENCY")
     return total_completed
 
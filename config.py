@@ -25,6 +25,13 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = 'uploads'
     ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
+    UPLOAD_BATCH_SIZE = 1000  # Rows per existence-check query when importing employees
+    
+    # Compiled Jinja templates cached on disk so new worker processes skip recompiling (off by default).
+    # JINJA_BYTECODE_CACHE_DIR may name an app-owned directory (owned by this user, not group/world-writable);
+    # when left empty, Jinja's private per-user directory is used.
+    JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', '').lower() in ['true', 'on', '1']
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR', '')
     
     # Evaluation settings
     MIN_EVALUATORS = 3
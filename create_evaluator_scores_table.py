@@ -2,8 +2,12 @@
 Create and populate evaluator_scores table with final scores for each evaluator_hash-evaluatee pair
 """
 from app import app
-from models import db, Employee, EvaluationCycle, FeedbackEvaluation, EvaluatorScore
-from collections import defaultdict
+from models import db, Employee, EvaluationCycle, FeedbackEvaluation, FeedbackQuestion, EvaluatorScore
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 def create_evaluator_scores_table():
@@ -32,59 +36,86 @@ def populate_evaluator_scores():
         for cycle in cycles:
             print(f"\nProcessing cycle: {cycle.name} (ID: {cycle.cycle_id})")
             
-            # Get all submitted feedback evaluations for this cycle
-            feedback_evaluations = FeedbackEvaluation.query.filter_by(
-                cycle_id=cycle.cycle_id,
-                status='submitted'
+            # Average and count of scored answers per evaluator_hash-evaluatee pair, computed in SQL.
+            # Only scored questions count (exclude open-ended and inactive/missing questions).
+            pair_rows = db.session.query(
+                FeedbackEvaluation.evaluator_hash,
+                FeedbackEvaluation.evaluatee_id,
+                func.avg(FeedbackEvaluation.score),
+                func.count(FeedbackEvaluation.score)
+            ).join(
+                FeedbackQuestion, FeedbackEvaluation.question_id == FeedbackQuestion.question_id
+            ).filter(
+                FeedbackEvaluation.cycle_id == cycle.cycle_id,
+                FeedbackEvaluation.status == 'submitted',
+                FeedbackEvaluation.score.isnot(None),
+                func.coalesce(FeedbackQuestion.is_open_ended, False) == False,
+                FeedbackQuestion.is_active == True
+            ).group_by(
+                FeedbackEvaluation.evaluator_hash, FeedbackEvaluation.evaluatee_id
             ).all()
             
-            print(f"Found {len(feedback_evaluations)} submitted feedback evaluations")
+            print(f"Found {len({row[0] for row in pair_rows})} unique evaluators")
             
-            # Group by evaluator_hash and evaluatee_id
-            evaluator_scores_dict = defaultdict(lambda: defaultdict(list))
+            # Pairs that already have a score (one query), used for reporting and the generic fallback
+            existing_by_pair = {
+                (score.evaluator_hash, score.evaluatee_id): score
+                for score in EvaluatorScore.query.filter_by(cycle_id=cycle.cycle_id).all()
+            }
             
-            for feedback in feedback_evaluations:
-                # Only include scored questions (exclude open-ended and inactive/missing questions)
-                if (feedback.score is not None and feedback.question
-                        and not getattr(feedback.question, 'is_open_ended', True)
-                        and getattr(feedback.question, 'is_active', True)):
-                    evaluator_scores_dict[feedback.evaluator_hash][feedback.evaluatee_id].append(feedback.score)
+            calculated_at = datetime.utcnow()
+            rows = []
+            for evaluator_hash, evaluatee_id, avg_score, question_count in pair_rows:
+                final_score = float(avg_score)
+                rows.append({
+                    'evaluator_hash': evaluator_hash,
+                    'evaluatee_id': evaluatee_id,
+                    'cycle_id': cycle.cycle_id,
+                    'final_score': final_score,
+                    'question_count': question_count,
+                    'calculated_at': calculated_at
+                })
+                if (evaluator_hash, evaluatee_id) in existing_by_pair:
+                    print(f"  Updated: evaluator_hash {evaluator_hash[:16]}... -> employee {evaluatee_id}: {final_score:.2f} ({question_count} questions)")
+                else:
+                    print(f"  Created: evaluator_hash {evaluator_hash[:16]}... -> employee {evaluatee_id}: {final_score:.2f} ({question_count} questions)")
+                    total_scores_created += 1
             
-            print(f"Found {len(evaluator_scores_dict)} unique evaluators")
-            
-            # Calculate and store final scores
-            for evaluator_hash, evaluatee_scores in evaluator_scores_dict.items():
-                for evaluatee_id, scores in evaluatee_scores.items():
-                    if scores:
-                        # Calculate average score for this evaluator-evaluatee pair
-                        final_score = sum(scores) / len(scores)
-                        
-                        # Check if score already exists
-                        existing = EvaluatorScore.query.filter_by(
-                            evaluator_hash=evaluator_hash,
-                            evaluatee_id=evaluatee_id,
-                            cycle_id=cycle.cycle_id
-                        ).first()
-                        
+            # Store final scores: one multi-row upsert on the (evaluator_hash, evaluatee_id, cycle_id) unique constraint
+            if rows:
+                dialect = db.session.get_bind().dialect.name
+                if dialect == 'mysql':
+                    stmt = mysql_insert(EvaluatorScore).values(rows)
+                    stmt = stmt.on_duplicate_key_update(
+                        final_score=stmt.inserted.final_score,
+                        question_count=stmt.inserted.question_count,
+                        calculated_at=stmt.inserted.calculated_at
+                    )
+                elif dialect in ('postgresql', 'sqlite'):
+                    insert = pg_insert if dialect == 'postgresql' else sqlite_insert
+                    stmt = insert(EvaluatorScore).values(rows)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['evaluator_hash', 'evaluatee_id', 'cycle_id'],
+                        set_={
+                            'final_score': stmt.excluded.final_score,
+                            'question_count': stmt.excluded.question_count,
+                            'calculated_at': stmt.excluded.calculated_at
+                        }
+                    )
+                else:
+                    stmt = None
+                
+                if stmt is not None:
+                    db.session.execute(stmt)
+                else:
+                    for row in rows:
+                        existing = existing_by_pair.get((row['evaluator_hash'], row['evaluatee_id']))
                         if existing:
-                            # Update existing score
-                            existing.final_score = final_score
-                            existing.question_count = len(scores)
-                            existing.calculated_at = datetime.utcnow()
-                            print(f"  Updated: evaluator_hash {evaluator_hash[:16]}... -> employee {evaluatee_id}: {final_score:.2f} ({len(scores)} questions)")
+                            existing.final_score = row['final_score']
+                            existing.question_count = row['question_count']
+                            existing.calculated_at = row['calculated_at']
                         else:
-                            # Create new score
-                            evaluator_score = EvaluatorScore(
-                                evaluator_hash=evaluator_hash,
-                                evaluatee_id=evaluatee_id,
-                                cycle_id=cycle.cycle_id,
-                                final_score=final_score,
-                                question_count=len(scores),
-                                calculated_at=datetime.utcnow()
-                            )
-                            db.session.add(evaluator_score)
-                            print(f"  Created: evaluator_hash {evaluator_hash[:16]}... -> employee {evaluatee_id}: {final_score:.2f} ({len(scores)} questions)")
-                            total_scores_created += 1
+                            db.session.add(EvaluatorScore(**row))
             
             # Commit for this cycle
             try:
@@ -106,7 +137,11 @@ def show_evaluator_scores_sample(employee_id=None):
         print("Sample Evaluator Scores:")
         print("=" * 80)
         
-        query = EvaluatorScore.query
+        # Employee and cycle names come with the scores (no query per row)
+        query = EvaluatorScore.query.options(
+            joinedload(EvaluatorScore.evaluatee),
+            joinedload(EvaluatorScore.cycle)
+        )
         if employee_id:
             query = query.filter_by(evaluatee_id=employee_id)
         
@@ -120,8 +155,8 @@ def show_evaluator_scores_sample(employee_id=None):
         print("-" * 90)
         
         for score in scores:
-            employee = Employee.query.get(score.evaluatee_id)
-            cycle = EvaluationCycle.query.get(score.cycle_id)
+            employee = score.evaluatee
+            cycle = score.cycle
             employee_name = employee.full_name if employee else f"ID {score.evaluatee_id}"
             cycle_name = cycle.name if cycle else f"ID {score.cycle_id}"
             
@@ -3,7 +3,8 @@ Cycle assignment: 360 and KPI evaluation assignments per cycle.
 Used when activating a new evaluation cycle (relationship-based 360 + hierarchical KPI).
 """
 import random
-from models import RandomizationLog, EvaluationRelationship
+import numpy as np
+from models import db, RandomizationLog, EvaluationRelationship
 
 try:
     from anonymization import hash_evaluator_id
@@ -11,9 +12,12 @@ except ImportError:
     import hashlib
     import hmac
     EVALUATOR_SALT = b'evaluator_anonymization_salt_2024'
+    # Key the HMAC once (ipad/opad state) and copy it per message
+    _HMAC_PROTOTYPE = hmac.new(EVALUATOR_SALT, digestmod=hashlib.sha256)
     def hash_evaluator_id(evaluator_id, cycle_id):
         message = f"{evaluator_id}_{cycle_id}".encode('utf-8')
-        hash_obj = hmac.new(EVALUATOR_SALT, message, hashlib.sha256)
+        hash_obj = _HMAC_PROTOTYPE.copy()
+        hash_obj.update(message)
         return hash_obj.hexdigest()
 
 
@@ -35,117 +39,131 @@ def assign_360_evaluations(employees, cycle_id):
     employee_list = list(employees.values()) if hasattr(employees, 'values') else list(employees)
     employee_by_id = {e.employee_id: e for e in employee_list}
     max_per_person = 10
-    assignment_set = set()  # (evaluator_id, evaluatee_id)
     
-    # Build valid pairs from EvaluationRelationship (only 1 or 0, not x or z)
+    # Build valid pairs from EvaluationRelationship (only 1 or 0, not x or z).
+    # The matrix is loaded once; pairs are unique on (evaluator_role, evaluatee_role).
+    rel_map = {
+        (rec.evaluator_role, rec.evaluatee_role): rec.relationship
+        for rec in EvaluationRelationship.query.filter(
+            EvaluationRelationship.relationship.in_(('1', '0'))
+        ).all()
+    }
     valid_pairs = {}
     for evaluator in employee_list:
         for evaluatee in employee_list:
             if evaluator.employee_id == evaluatee.employee_id:
                 continue
-            rec = EvaluationRelationship.query.filter_by(
-                evaluator_role=evaluator.full_name,
-                evaluatee_role=evaluatee.full_name
-            ).first()
-            if rec and rec.relationship in ('1', '0'):
-                valid_pairs[(evaluator.employee_id, evaluatee.employee_id)] = rec.relationship
+            rel = rel_map.get((evaluator.full_name, evaluatee.full_name))
+            if rel:
+                valid_pairs[(evaluator.employee_id, evaluatee.employee_id)] = rel
     
-    # Per-evaluatee: targets
-    direct_candidates = {eid: [] for eid in employee_by_id}
-    indirect_candidates = {eid: [] for eid in employee_by_id}
-    for (eval_id, eval_ee_id), rel in valid_pairs.items():
-        if rel == '1':
-            direct_candidates[eval_ee_id].append(eval_id)
-        else:
-            indirect_candidates[eval_ee_id].append(eval_id)
+    # Structure-of-arrays layout: employees by index, valid pairs as parallel arrays
+    # (in valid_pairs order, so ties are broken exactly as before)
+    employee_ids = list(employee_by_id)
+    index_of = {eid: i for i, eid in enumerate(employee_ids)}
+    n_employees = len(employee_ids)
+    pair_evaluator = np.fromiter((index_of[eval_id] for eval_id, _ in valid_pairs), dtype=np.int32, count=len(valid_pairs))
+    pair_evaluatee = np.fromiter((index_of[eval_ee_id] for _, eval_ee_id in valid_pairs), dtype=np.int32, count=len(valid_pairs))
+    pair_direct = np.fromiter((rel == '1' for rel in valid_pairs.values()), dtype=bool, count=len(valid_pairs))
     
-    target_received = {}
-    target_direct = {}
-    for eid in employee_by_id:
-        n_direct = len(direct_candidates[eid])
-        n_indirect = len(indirect_candidates[eid])
-        total_available = n_direct + n_indirect
-        target_received[eid] = min(max_per_person, total_available)
-        target_direct[eid] = min(round(0.7 * target_received[eid]), n_direct)
-        target_direct[eid] = min(target_direct[eid], target_received[eid])
+    # Per-evaluatee: targets
+    n_direct = np.bincount(pair_evaluatee[pair_direct], minlength=n_employees)
+    n_indirect = np.bincount(pair_evaluatee[~pair_direct], minlength=n_employees)
+    total_available = n_direct + n_indirect
+    target_received = np.minimum(max_per_person, total_available)
+    target_direct = np.minimum(np.round(0.7 * target_received).astype(np.int64), n_direct)
+    target_direct = np.minimum(target_direct, target_received)
     
-    received_count = {eid: 0 for eid in employee_by_id}
-    direct_received = {eid: 0 for eid in employee_by_id}
-    submitted_count = {eid: 0 for eid in employee_by_id}
+    received_count = np.zeros(n_employees, dtype=np.int64)
+    direct_received = np.zeros(n_employees, dtype=np.int64)
+    submitted_count = np.zeros(n_employees, dtype=np.int64)
+    assigned = np.zeros(len(valid_pairs), dtype=bool)
     assignments = []
     
-    def can_assign(eval_id, eval_ee_id):
-        if (eval_id, eval_ee_id) in assignment_set:
-            return False
-        if submitted_count[eval_id] >= max_per_person:
-            return False
-        if received_count[eval_ee_id] >= target_received[eval_ee_id]:
-            return False
-        return (eval_id, eval_ee_id) in valid_pairs
-    
-    def score_candidate(eval_id, eval_ee_id):
-        rel = valid_pairs.get((eval_id, eval_ee_id))
-        if not rel:
-            return -1
-        eval_ee_need = target_received[eval_ee_id] - received_count[eval_ee_id]
-        eval_need = max_per_person - submitted_count[eval_id]
-        score = eval_ee_need + eval_need
-        if rel == '1' and direct_received[eval_ee_id] < target_direct[eval_ee_id]:
-            score += 100
-        elif rel == '0' and direct_received[eval_ee_id] >= target_direct[eval_ee_id]:
-            score += 50
-        return score
-    
     max_iter = len(valid_pairs) * 2
     for _ in range(max_iter):
-        candidates = [
-            (eval_id, eval_ee_id)
-            for (eval_id, eval_ee_id) in valid_pairs
-            if can_assign(eval_id, eval_ee_id)
-        ]
-        if not candidates:
+        # Pairs that can still be assigned: not yet taken, evaluator under cap, evaluatee under target
+        candidates = np.flatnonzero(
+            ~assigned
+            & (submitted_count[pair_evaluator] < max_per_person)
+            & (received_count[pair_evaluatee] < target_received[pair_evaluatee])
+        )
+        if candidates.size == 0:
             break
-        scored = [(score_candidate(eid, eeid), eid, eeid) for (eid, eeid) in candidates]
-        scored.sort(reverse=True, key=lambda x: x[0])
-        top_n = min(25, len(scored))
-        top_tier = [(eid, eeid) for _, eid, eeid in scored[:top_n]]
-        eval_id, eval_ee_id = random.choice(top_tier)
-        rel = valid_pairs[(eval_id, eval_ee_id)]
-        assignment_set.add((eval_id, eval_ee_id))
-        assignments.append((eval_id, eval_ee_id))
-        received_count[eval_ee_id] += 1
-        submitted_count[eval_id] += 1
-        if rel == '1':
-            direct_received[eval_ee_id] += 1
+        cand_evaluator = pair_evaluator[candidates]
+        cand_evaluatee = pair_evaluatee[candidates]
+        cand_direct = pair_direct[candidates]
+        direct_short = direct_received[cand_evaluatee] < target_direct[cand_evaluatee]
+        scores = (
+            (target_received[cand_evaluatee] - received_count[cand_evaluatee])
+            + (max_per_person - submitted_count[cand_evaluator])
+            + np.where(cand_direct & direct_short, 100, 0)
+            + np.where(~cand_direct & ~direct_short, 50, 0)
+        )
+        # Stable descending sort keeps the previous tie order
+        top_n = min(25, candidates.size)
+        top_tier = candidates[np.argsort(-scores, kind='stable')[:top_n]]
+        pick = int(random.choice(top_tier))
+        eval_idx = pair_evaluator[pick]
+        eval_ee_idx = pair_evaluatee[pick]
+        assigned[pick] = True
+        assignments.append((employee_ids[eval_idx], employee_ids[eval_ee_idx]))
+        received_count[eval_ee_idx] += 1
+        submitted_count[eval_idx] += 1
+        if pair_direct[pick]:
+            direct_received[eval_ee_idx] += 1
     
-    for evaluator_id, evaluatee_id in assignments:
-        log = RandomizationLog(
+    # One hash per distinct evaluator, not per assignment
+    hashes = {eval_id: hash_evaluator_id(eval_id, cycle_id) for eval_id in {e for e, _ in assignments}}
+    log_rows = [
+        dict(
             cycle_id=cycle_id,
-            evaluator_hash=hash_evaluator_id(evaluator_id, cycle_id),
+            evaluator_hash=hashes[evaluator_id],
             evaluatee_id=evaluatee_id,
             evaluation_type='360'
         )
-        from models import db
-        db.session.add(log)
+        for evaluator_id, evaluatee_id in assignments
+    ]
+    if log_rows:
+        db.session.bulk_insert_mappings(RandomizationLog, log_rows)
 
 
 def assign_kpi_evaluations(employees, cycle_id):
     """Assign KPI evaluations based on hierarchical structure (manager-to-subordinate)."""
-    from kpi_evaluation import can_evaluate_kpi, create_kpi_evaluation_assignment
+    from kpi_evaluation import can_evaluate_kpi
     
     employee_list = list(employees.values()) if hasattr(employees, 'values') else list(employees)
+    
+    # can_evaluate_kpi depends only on the two roles: evaluate each distinct role pair once
+    roles = {e.role for e in employee_list}
+    role_matrix = {
+        (evaluator_role, evaluatee_role): can_evaluate_kpi(evaluator_role, evaluatee_role)
+        for evaluator_role in roles
+        for evaluatee_role in roles
+    }
+    
+    # Pairs already assigned in this cycle (one query instead of one per pair, as
+    # create_kpi_evaluation_assignment does); new rows are inserted together
+    existing_pairs = {
+        (evaluator_id, evaluatee_id)
+        for evaluator_id, evaluatee_id in db.session.query(
+            RandomizationLog.evaluator_id, RandomizationLog.evaluatee_id
+        ).filter_by(cycle_id=cycle_id, evaluation_type='kpi').all()
+    }
+    log_rows = []
     for evaluator in employee_list:
-        evaluatable = []
         for evaluatee in employee_list:
             if evaluator.employee_id == evaluatee.employee_id:
                 continue
-            if can_evaluate_kpi(evaluator.role, evaluatee.role):
-                evaluatable.append(evaluatee)
-        for evaluatee in evaluatable:
-            assignment = create_kpi_evaluation_assignment(
-                cycle_id,
-                evaluator.employee_id,
-                evaluatee.employee_id
-            )
-            from models import db
-            db.session.add(assignment)
+            if not role_matrix[(evaluator.role, evaluatee.role)]:
+                continue
+            if (evaluator.employee_id, evaluatee.employee_id) in existing_pairs:
+                continue
+            log_rows.append(dict(
+                cycle_id=cycle_id,
+                evaluator_id=evaluator.employee_id,
+                evaluatee_id=evaluatee.employee_id,
+                evaluation_type='kpi'
+            ))
+    if log_rows:
+        db.session.bulk_insert_mappings(RandomizationLog, log_rows)
@@ -3,7 +3,7 @@ KPI Creation System - Manager-Based KPI Creation with Approval Workflow
 Each manager can create KPIs for their subordinates, which must be approved by CEO before use.
 Uses KPICreationRule from DB when available; falls back to KPI_CREATION_HIERARCHY.
 """
-from models import Employee, KPI, KPICreationRule
+from models import db, Employee, KPI, KPICreationRule, employee_kpis
 from flask_login import current_user
 
 # Define who can create KPIs for which roles (matches org hierarchy)
@@ -220,3 +220,28 @@ def get_kpi_creator_for_employee(employee_id, exclude_kpi_id=None):
             continue
         return kpi.created_by  # First creator found
     return None
+
+
+def get_kpi_creators_for_employees(employee_ids, exclude_kpi_id=None):
+    """
+    Batch version of get_kpi_creator_for_employee: one query for many employees.
+    Returns {employee_id: created_by} for employees that already have assigned KPIs
+    (created_by may be None for admin KPIs); employees without KPIs are absent.
+    """
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return {}
+    query = db.session.query(employee_kpis.c.employee_id, KPI.created_by).join(
+        KPI, KPI.kpi_id == employee_kpis.c.kpi_id
+    ).filter(
+        employee_kpis.c.employee_id.in_(employee_ids),
+        KPI.applies_to_all == False,
+        KPI.is_active == True,
+        KPI.status.in_(['draft', 'pending_review', 'approved'])
+    )
+    if exclude_kpi_id:
+        query = query.filter(KPI.kpi_id != exclude_kpi_id)
+    creators = {}
+    for employee_id, created_by in query.order_by(KPI.kpi_id).all():
+        creators.setdefault(employee_id, created_by)  # First creator found
+    return creators
@@ -11,6 +11,7 @@ from kpi_creation import (
     calculate_total_weight_for_employee, get_remaining_weight_for_employee,
     get_kpi_creator_for_employee
 )
+from utils import invalidate_dashboard_cache
 from datetime import datetime
 
 def register_kpi_creation_routes(app):
@@ -159,6 +160,7 @@ def register_kpi_creation_routes(app):
                     if emp:
                         kpi.assigned_employees.append(emp)
                 db.session.commit()
+                invalidate_dashboard_cache()
                 
                 flash('KPI created successfully! It will be submitted for CEO approval.', 'success')
                 return redirect(url_for('my_kpis'))
@@ -232,6 +234,7 @@ def register_kpi_creation_routes(app):
             kpi.created_by = manager.employee_id
             kpi.status = 'draft'  # Set to draft first
             db.session.commit()
+            invalidate_dashboard_cache()
             flash('Default KPI converted to your KPI.', 'info')
         
         # Now treat it as a regular KPI - verify ownership
@@ -273,10 +276,12 @@ def register_kpi_creation_routes(app):
             kpi.approved_by = manager.employee_id
             kpi.approved_at = datetime.utcnow()
             db.session.commit()
+            invalidate_dashboard_cache()
             flash('KPI submitted and approved automatically (CEO).', 'success')
         else:
             kpi.status = 'pending_review'
             db.session.commit()
+            invalidate_dashboard_cache()
             flash('KPI submitted for CEO approval.', 'success')
         
         return redirect(url_for('my_kpis'))
@@ -298,6 +303,7 @@ def register_kpi_creation_routes(app):
             kpi.created_by = manager.employee_id
             kpi.status = 'draft'  # Set to draft so it can be edited
             db.session.commit()
+            invalidate_dashboard_cache()
             flash('Default KPI converted to your KPI. You can now edit it.', 'info')
         
         # Now treat it as a regular KPI - verify ownership and status
@@ -367,6 +373,7 @@ def register_kpi_creation_routes(app):
                     kpi.decline_reason = None  # Clear decline reason
                 
                 db.session.commit()
+                invalidate_dashboard_cache()
                 flash('KPI updated successfully!', 'success')
                 return redirect(url_for('my_kpis'))
         
@@ -407,6 +414,7 @@ def register_kpi_creation_routes(app):
             # Actually, let's allow deletion of default KPIs - they can be recreated if needed
             kpi.is_active = False
             db.session.commit()
+            invalidate_dashboard_cache()
             flash('KPI removed successfully!', 'success')
             return redirect(url_for('my_kpis'))
         
@@ -421,6 +429,7 @@ def register_kpi_creation_routes(app):
         
         db.session.delete(kpi)
         db.session.commit()
+        invalidate_dashboard_cache()
         flash('KPI deleted successfully!', 'success')
         return redirect(url_for('my_kpis'))
     
@@ -484,6 +493,7 @@ def register_kpi_creation_routes(app):
         kpi.approved_at = datetime.utcnow()
         
         db.session.commit()
+        invalidate_dashboard_cache()
         flash('KPI approved successfully!', 'success')
         return redirect(url_for('pending_kpi_approvals'))
     
@@ -513,6 +523,7 @@ def register_kpi_creation_routes(app):
         kpi.decline_reason = decline_reason
         
         db.session.commit()
+        invalidate_dashboard_cache()
         flash(f'KPI "{kpi.kpi_name}" has been declined.', 'info')
         return redirect(url_for('pending_kpi_approvals'))
     
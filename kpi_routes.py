@@ -5,6 +5,7 @@ Handles all KPI evaluation functionality with hierarchical access control
 from flask import render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from models import db, Employee, KPI, Evaluation, EvaluationCycle, RandomizationLog
+from utils import invalidate_dashboard_cache
 from datetime import datetime
 import json
 from kpi_evaluation import (
@@ -53,6 +54,7 @@ def register_kpi_routes(app):
                 )
                 db.session.add(assignment)
                 db.session.commit()
+                invalidate_dashboard_cache()
             
             # Get existing evaluation
             existing = Evaluation.query.filter_by(
@@ -99,6 +101,7 @@ def register_kpi_routes(app):
             )
             db.session.add(assignment)
             db.session.commit()
+            invalidate_dashboard_cache()
         
         # Get KPIs for this employee (employee-based assignment)
         from kpi_creation import get_kpis_for_employee
@@ -151,6 +154,7 @@ def register_kpi_routes(app):
                 db.session.add(evaluation)
             
             db.session.commit()
+            invalidate_dashboard_cache()
             flash('KPI evaluation saved successfully!', 'success')
             return redirect(url_for('my_kpi_evaluations'))
         
@@ -304,6 +308,7 @@ def register_kpi_routes(app):
         evaluation.approved_at = datetime.utcnow()
         evaluation.approved_by = approver.employee_id
         db.session.commit()
+        invalidate_dashboard_cache()
         
         flash('KPI evaluation approved successfully! The employee will now see their scores in their portal.', 'success')
         # Redirect to KPI Results so approver can verify the employee shows "Approved"
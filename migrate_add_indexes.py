@@ -0,0 +1,31 @@
+"""
+Add secondary indexes declared in models.py to an existing database if missing.
+Run once: python migrate_add_indexes.py
+"""
+from app import app
+from models import db
+from sqlalchemy import inspect, text
+
+# (table, index name, columns)
+INDEXES = [
+    ('evaluation_cycles', 'ix_evaluation_cycles_status', ['status']),
+    ('feedback_evaluations', 'ix_feedback_evaluations_assignment_status', ['evaluator_hash', 'evaluatee_id', 'cycle_id', 'status']),
+    ('feedback_evaluations', 'ix_feedback_evaluations_evaluatee_cycle', ['evaluatee_id', 'cycle_id']),
+]
+
+def migrate():
+    with app.app_context():
+        inspector = inspect(db.engine)
+        for table, name, columns in INDEXES:
+            existing = {ix['name'] for ix in inspector.get_indexes(table)}
+            if name in existing:
+                print(f"Index '{name}' already exists.")
+                continue
+            print(f"Adding index '{name}' on {table}({', '.join(columns)})...")
+            db.session.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+            db.session.commit()
+            print(f"Added '{name}'.")
+        print("Done.")
+
+if __name__ == '__main__':
+    migrate()
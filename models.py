@@ -105,7 +105,7 @@ class EvaluationCycle(db.Model):
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
     description = db.Column(db.Text, nullable=True)
-    status = db.Column(db.String(20), default='draft')  # draft, active, completed
+    status = db.Column(db.String(20), default='draft', index=True)  # draft, active, completed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     include_kpi = db.Column(db.Boolean, default=True, nullable=False)   # This round includes KPI evaluations
     include_360 = db.Column(db.Boolean, default=True, nullable=False)   # This round includes 360 feedback
@@ -203,6 +203,13 @@ class FeedbackEvaluation(db.Model):
     # Relationships (evaluator relationship removed for anonymity)
     evaluatee = db.relationship('Employee', foreign_keys=[evaluatee_id])
     question = db.relationship('FeedbackQuestion')
+    
+    # Composite indexes for the hot filters: one evaluator's answers for an assignment (by status),
+    # and everything received by an evaluatee in a cycle
+    __table_args__ = (
+        db.Index('ix_feedback_evaluations_assignment_status', 'evaluator_hash', 'evaluatee_id', 'cycle_id', 'status'),
+        db.Index('ix_feedback_evaluations_evaluatee_cycle', 'evaluatee_id', 'cycle_id'),
+    )
 
 class EvaluatorScore(db.Model):
     """Store final calculated score for each evaluator_hash-evaluatee pair"""
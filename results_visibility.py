@@ -346,10 +346,12 @@ def calculate_employee_performance(employee_id, cycle_id):
     
     if employee and submitted_feedbacks:
         unique_evaluator_hashes = set(f.evaluator_hash for f in submitted_feedbacks)
-        from anonymization import hash_evaluator_id
+        from anonymization import hash_evaluator_ids_batch
         
-        for emp in Employee.query.filter_by(status='active').all():
-            test_hash = hash_evaluator_id(emp.employee_id, cycle_id)
+        active_employees = Employee.query.filter_by(status='active').all()
+        hashes = hash_evaluator_ids_batch((emp.employee_id for emp in active_employees), cycle_id)
+        for emp in active_employees:
+            test_hash = hashes[emp.employee_id]
             if test_hash in unique_evaluator_hashes:
                 evaluator_map[test_hash] = emp
         
@@ -3,7 +3,7 @@ Comprehensive data seeding script
 Creates all users, KPIs, 360 questions, and evaluation cycle
 Run this once to populate the database with demo data
 """
-from app import app
+from app import app, DEFAULT_PASSWORD_HASH
 from models import db, User, Employee, KPI, EvaluationCycle, FeedbackQuestion, RandomizationLog, FeedbackEvaluation, Evaluation, EvaluationRelationship, KPICreationRule
 from kpi_creation import KPI_CREATION_HIERARCHY
 from datetime import date, datetime, timedelta
@@ -138,6 +138,7 @@ def seed_all_data():
             'analysis': 'department_manager', 'analysis1': 'employee', 'analysis2': 'employee',
         }
         
+        # Default password for all users: password123 (hashed once in app.py)
         for emp_key, emp in employees.items():
             # Check if user already exists
             existing_user = User.query.filter_by(employee_id=emp.employee_id).first()
@@ -153,11 +154,9 @@ def seed_all_data():
             user = User(
                 employee_id=emp.employee_id,
                 email=emp.email,
-                role=role
+                role=role,
+                password_hash=DEFAULT_PASSWORD_HASH
             )
-            # Default password for all users: password123
-            # CEO/admin gets both passwords set (can login with either email)
-            user.set_password('password123')
             db.session.add(user)
         
         # Also create admin@company.com login that points to CEO
@@ -133,8 +133,12 @@ def seed_360_evaluations(cycle_id, max_per_evaluatee=5):
             ).count()
             if existing_count > 0:
                 continue
+            # Plain rows inserted with one Core executemany per evaluator (no ORM objects);
+            # they are in the database before _store_evaluator_score reads them back
+            now = datetime.utcnow()
+            rows = []
             for q in scored_questions:
-                db.session.add(FeedbackEvaluation(
+                rows.append(dict(
                     evaluator_hash=evaluator_hash,
                     evaluatee_id=evaluatee_id,
                     cycle_id=cycle_id,
@@ -142,11 +146,10 @@ def seed_360_evaluations(cycle_id, max_per_evaluatee=5):
                     score=_360_score(),
                     comment=_comment() if random.random() < 0.2 else None,
                     status='submitted',
-                    submitted_at=datetime.utcnow(),
+                    submitted_at=now,
                 ))
-                created += 1
             for q in open_questions:
-                db.session.add(FeedbackEvaluation(
+                rows.append(dict(
                     evaluator_hash=evaluator_hash,
                     evaluatee_id=evaluatee_id,
                     cycle_id=cycle_id,
@@ -154,9 +157,11 @@ def seed_360_evaluations(cycle_id, max_per_evaluatee=5):
                     score=None,
                     comment=_comment(),
                     status='submitted',
-                    submitted_at=datetime.utcnow(),
+                    submitted_at=now,
                 ))
-                created += 1
+            if rows:
+                db.session.execute(FeedbackEvaluation.__table__.insert(), rows)
+                created += len(rows)
             _store_evaluator_score(evaluator_hash, evaluatee_id, cycle_id)
     return created
 
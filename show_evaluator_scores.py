@@ -5,6 +5,7 @@ hash 2 employee 5 score = 3.9 etc .....
 """
 from app import app
 from models import db, Employee, EvaluationCycle, EvaluatorScore
+from sqlalchemy.orm import joinedload
 
 def show_evaluator_scores(employee_id=None, cycle_id=None):
     """Show evaluator scores for specific employee or all employees"""
@@ -17,7 +18,8 @@ def show_evaluator_scores(employee_id=None, cycle_id=None):
             print("All Evaluator Scores")
         print("=" * 80)
         
-        query = EvaluatorScore.query
+        # Employee names come with the scores (no query per employee group)
+        query = EvaluatorScore.query.options(joinedload(EvaluatorScore.evaluatee))
         
         if employee_id:
             query = query.filter_by(evaluatee_id=employee_id)
@@ -49,7 +51,7 @@ def show_evaluator_scores(employee_id=None, cycle_id=None):
             if score.evaluatee_id != current_employee_id:
                 if current_employee_id is not None:
                     print()  # Blank line between employees
-                employee = Employee.query.get(score.evaluatee_id)
+                employee = score.evaluatee
                 employee_name = employee.full_name if employee else f"Employee ID {score.evaluatee_id}"
                 print(f"\n{employee_name} (ID: {score.evaluatee_id}):")
                 current_employee_id = score.evaluatee_id
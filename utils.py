@@ -1,13 +1,68 @@
 import pandas as pd
+import csv
 import random
+import threading
+import time
 from datetime import datetime
 import json
 
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# Dashboard data is cached briefly so polling / multiple tabs don't replay every query.
+# The cache is per process: invalidate_dashboard_cache only clears the worker that handled the
+# change, so with several workers a dashboard can show already-submitted items for up to the TTL.
+DASHBOARD_CACHE_TTL = 30  # seconds
+_dashboard_cache = {}
+_dashboard_cache_lock = threading.Lock()
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def iter_upload_rows(filepath):
+    """
+    Stream rows from an uploaded CSV/XLSX file one at a time (no DataFrame).
+    
+    Yields:
+        First the list of column names, then one dict per data row.
+    """
+    if filepath.lower().endswith('.csv'):
+        with open(filepath, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            yield [name.strip() for name in (reader.fieldnames or [])]
+            for row in reader:
+                yield {(k.strip() if k else k): v for k, v in row.items()}
+    elif CalamineWorkbook is not None:
+        # Rust-backed reader; much faster than openpyxl on large workbooks (also reads .xls)
+        sheet = CalamineWorkbook.from_path(filepath).get_sheet_by_index(0)
+        rows = iter(sheet.to_python(skip_empty_area=True))
+        header = next(rows, None) or ()
+        columns = [str(c).strip() if c is not None else '' for c in header]
+        yield columns
+        for values in rows:
+            # Calamine returns '' for empty cells
+            if all(v in (None, '') for v in values):
+                continue
+            yield dict(zip(columns, values))
+    else:
+        from openpyxl import load_workbook
+        wb = load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            columns = [str(c).strip() if c is not None else '' for c in header]
+            yield columns
+            for values in rows:
+                if all(v is None for v in values):
+                    continue
+                yield dict(zip(columns, values))
+        finally:
+            wb.close()
+
 def assign_evaluators(employees_df, min_peer=3, cross_department=True, exclude_past_assignments=True):
     """
     Assign evaluators to employees based on randomization rules.
@@ -336,3 +391,53 @@ def send_notification_email(recipient_email, subject, body):
     print(f"Email notification to {recipient_email}: {subject}")
     print(f"Body: {body}")
     pass
+
+def _plain_dashboard_value(value):
+    """
+    Copy dashboard data into plain dicts/lists: model instances become {column: value} dicts.
+    Cached data is shared across requests and threads, so it must not hold session-bound ORM objects.
+    Templates read dict keys with the same attribute syntax (data.latest_cycle.name).
+    Only column values are kept: dashboard templates must not read relationships (kpi.employees,
+    cycle.evaluations, ...) from this data, as those attributes are simply undefined here.
+    """
+    from sqlalchemy import inspect as sa_inspect
+    
+    if isinstance(value, dict):
+        return {k: _plain_dashboard_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain_dashboard_value(v) for v in value]
+    state = sa_inspect(value, raiseerr=False)
+    if state is not None and getattr(state, 'mapper', None) is not None:
+        return {attr.key: getattr(value, attr.key) for attr in state.mapper.column_attrs}
+    return value
+
+def get_cached_dashboard_data(employee_id, role, active_cycle_id):
+    """
+    get_dashboard_data with a short TTL cache keyed on (employee_id, role, active cycle).
+    active_cycle_id comes from the caller's per-request active cycle lookup; a change of active
+    cycle produces a new key, so stale cycle data is never served.
+    Entries hold plain column copies (see _plain_dashboard_value), never ORM instances.
+    """
+    key = (employee_id, role, active_cycle_id)
+    now = time.monotonic()
+    with _dashboard_cache_lock:
+        entry = _dashboard_cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+    
+    data = _plain_dashboard_value(get_dashboard_data(employee_id, role))
+    with _dashboard_cache_lock:
+        # Drop expired entries so the cache doesn't grow with every user that ever logged in
+        for k in [k for k, (expires, _) in _dashboard_cache.items() if expires <= now]:
+            del _dashboard_cache[k]
+        _dashboard_cache[key] = (now + DASHBOARD_CACHE_TTL, data)
+    return data
+
+def invalidate_dashboard_cache(employee_id=None):
+    """Drop cached dashboard data for one employee (or everyone when employee_id is None)."""
+    with _dashboard_cache_lock:
+        if employee_id is None:
+            _dashboard_cache.clear()
+        else:
+            for k in [k for k in _dashboard_cache if k[0] == employee_id]:
+                del _dashboard_cache[k]